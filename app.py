@@ -1,5 +1,12 @@
+import os
+
 from backend import create_app
 
+if __name__ == "__main__":
+    # Set before create_app so it can tell the reloader's watcher process,
+    # which must not start the scheduler, from the child serving requests.
+    os.environ.setdefault("FLASK_DEBUG", "1")
+
 app = create_app()
 
 if __name__ == "__main__":
@@ -1,16 +1,22 @@
 
 from flask import Flask, send_from_directory
 from flask_migrate import Migrate
-from backend.extensions import db
+from backend.extensions import db, identity_cache, password_hasher, catalog_cache, search_cache, product_details_cache, cart_summaries, bestseller_ranking, trending, scheduler
+from backend.models import ProductRatingStats
+from backend.utils.idempotency import purge_idempotency_keys
+from backend.utils.serializers import FastJSONProvider
 from backend.routes.auth import auth_bp
 from backend.routes.orders import order_bp
-from backend.routes.products import product_bp
-from backend.routes.cart import cart_bp
+from backend.routes.products import product_bp, build_search_index
+from backend.routes.cart import cart_bp, compact_abandoned_carts
 from backend.routes.payments import payment_bp
 from backend.routes.checkout import checkout_bp
 from backend.routes.admin import admin_bp
+from backend.routes.bestsellers import bestsellers_bp, refresh_bestsellers, load_trending, snapshot_trending
 from backend.routes.uploads import upload_bp
+from backend.routes.wishlist import wishlist_bp
 from flask_cors import CORS
+from sqlalchemy.exc import SQLAlchemyError
 import os
 
 from backend.config.config import Config
@@ -19,6 +25,7 @@ def create_app():
     app = Flask(__name__,
                 template_folder="../frontend/templates",
                 static_folder="static")
+    app.json = FastJSONProvider(app)
 
     os.makedirs(os.path.join(app.root_path, 'uploads'), exist_ok=True)
     os.makedirs(os.path.join(app.root_path, 'static', 'uploads'), exist_ok=True)
@@ -29,7 +36,8 @@ def create_app():
 
     CORS(app,
          origins=["http://localhost:5174", "http://localhost:5175", "http://localhost:3000", "http://127.0.0.1:5175", "http://127.0.0.1:3000"],
-         allow_headers=["Content-Type", "Authorization"],
+         allow_headers=["Content-Type", "Authorization", "Idempotency-Key", "X-Guest-Cart"],
+         expose_headers=["Idempotent-Replayed", "ETag"],
          methods=["GET", "POST", "PUT", "DELETE", "OPTIONS"],
          supports_credentials=True,
          max_age=3600)
@@ -44,10 +52,27 @@ def create_app():
     app.config.from_object(Config)
 
     db.init_app(app)
+    identity_cache.init_app(app)
+    password_hasher.init_app(app)
+    catalog_cache.init_app(app)
+    search_cache.init_app(app)
+    product_details_cache.init_app(app)
+    cart_summaries.init_app(app)
+    bestseller_ranking.init_app(app)
+    trending.init_app(app)
+    scheduler.init_app(app)
     Migrate(app, db)
 
     with app.app_context():
         db.create_all()
+        try:
+            if not ProductRatingStats.query.first():
+                ProductRatingStats.rebuild()
+            build_search_index()
+            load_trending()
+        except SQLAlchemyError as e:
+            db.session.rollback()
+            app.logger.warning(f"Skipping startup catalog warm-up: {str(e)}")
 
     app.register_blueprint(auth_bp)
     app.register_blueprint(order_bp)
@@ -57,5 +82,18 @@ def create_app():
     app.register_blueprint(checkout_bp)
     app.register_blueprint(admin_bp)
     app.register_blueprint(upload_bp)
+    app.register_blueprint(bestsellers_bp)
+    app.register_blueprint(wishlist_bp)
+
+    scheduler.add_job("bestsellers_refresh", refresh_bestsellers,
+                      app.config["BESTSELLERS_REFRESH_SECONDS"], run_immediately=True)
+    scheduler.add_job("trending_snapshot", snapshot_trending, app.config["TRENDING_SNAPSHOT_SECONDS"])
+    scheduler.add_job("cart_compaction", compact_abandoned_carts, app.config["CART_COMPACTION_INTERVAL_SECONDS"])
+    scheduler.add_job("idempotency_purge", purge_idempotency_keys, app.config["IDEMPOTENCY_PURGE_INTERVAL_SECONDS"])
+    # Under the debug reloader create_app also runs in the watcher process,
+    # which serves no requests; only the child it spawns runs the jobs.
+    reloader_parent = app.debug and os.environ.get("WERKZEUG_RUN_MAIN") != "true"
+    if app.config["SCHEDULER_ENABLED"] and not reloader_parent:
+        scheduler.start()
 
     return app
@@ -12,3 +12,27 @@ class Config:
     SESSION_COOKIE_SAMESITE = os.getenv('SESSION_COOKIE_SAMESITE', 'Lax')
     REMEMBER_COOKIE_DURATION = int(os.getenv('REMEMBER_COOKIE_DURATION', 86400))
     TOKEN_EXPIRATION_DAYS = int(os.getenv('TOKEN_EXPIRATION_DAYS', 1))
+    IDENTITY_CACHE_SIZE = int(os.getenv('IDENTITY_CACHE_SIZE', 1024))
+    IDENTITY_CACHE_TTL = int(os.getenv('IDENTITY_CACHE_TTL', 300))
+    HASH_POOL_WORKERS = int(os.getenv('HASH_POOL_WORKERS', 4))
+    HASH_POOL_QUEUE_DEPTH = int(os.getenv('HASH_POOL_QUEUE_DEPTH', 16))
+    HASH_POOL_TIMEOUT = float(os.getenv('HASH_POOL_TIMEOUT', 10))
+    CATALOG_CACHE_SIZE = int(os.getenv('CATALOG_CACHE_SIZE', 1024))
+    SEARCH_CACHE_SIZE = int(os.getenv('SEARCH_CACHE_SIZE', 128))
+    PRODUCT_DETAILS_CACHE_SIZE = int(os.getenv('PRODUCT_DETAILS_CACHE_SIZE', 512))
+    CART_SUMMARY_CACHE_SIZE = int(os.getenv('CART_SUMMARY_CACHE_SIZE', 4096))
+    GUEST_CART_MAX_AGE = int(os.getenv('GUEST_CART_MAX_AGE', 30 * 86400))
+    GUEST_CART_MAX_ITEMS = int(os.getenv('GUEST_CART_MAX_ITEMS', 50))
+    CART_IDLE_DAYS = int(os.getenv('CART_IDLE_DAYS', 30))
+    CART_COMPACTION_BATCH_SIZE = int(os.getenv('CART_COMPACTION_BATCH_SIZE', 200))
+    CART_COMPACTION_INTERVAL_SECONDS = int(os.getenv('CART_COMPACTION_INTERVAL_SECONDS', 3600))
+    SCHEDULER_ENABLED = os.getenv('SCHEDULER_ENABLED', 'True') == 'True'
+    BESTSELLERS_WINDOW_DAYS = int(os.getenv('BESTSELLERS_WINDOW_DAYS', 30))
+    BESTSELLERS_MAX_SIZE = int(os.getenv('BESTSELLERS_MAX_SIZE', 50))
+    BESTSELLERS_REFRESH_SECONDS = int(os.getenv('BESTSELLERS_REFRESH_SECONDS', 300))
+    BESTSELLERS_OVERLAP_ORDERS = int(os.getenv('BESTSELLERS_OVERLAP_ORDERS', 1000))
+    TRENDING_HALF_LIFE_SECONDS = int(os.getenv('TRENDING_HALF_LIFE_SECONDS', 3600))
+    TRENDING_SNAPSHOT_SECONDS = int(os.getenv('TRENDING_SNAPSHOT_SECONDS', 300))
+    TRENDING_MAX_SIZE = int(os.getenv('TRENDING_MAX_SIZE', 50))
+    IDEMPOTENCY_KEY_TTL_SECONDS = int(os.getenv('IDEMPOTENCY_KEY_TTL_SECONDS', 86400))
+    IDEMPOTENCY_PURGE_INTERVAL_SECONDS = int(os.getenv('IDEMPOTENCY_PURGE_INTERVAL_SECONDS', 3600))
@@ -1,3 +1,21 @@
 from flask_sqlalchemy import SQLAlchemy
+from backend.utils.bestsellers import BestsellerRanking
+from backend.utils.cart_summary_cache import CartSummaryCache
+from backend.utils.catalog_cache import CatalogCache
+from backend.utils.identity_cache import IdentityCache
+from backend.utils.password_hasher import PasswordHasher
+from backend.utils.scheduler import Scheduler
+from backend.utils.search_index import ProductSearchIndex
+from backend.utils.trending import TrendingEngine
 
 db = SQLAlchemy()
+identity_cache = IdentityCache()
+password_hasher = PasswordHasher()
+catalog_cache = CatalogCache()
+search_cache = CatalogCache(maxsize=128, parent=catalog_cache, name="search_cache")
+product_details_cache = CatalogCache(maxsize=512, parent=catalog_cache, name="product_details_cache")
+cart_summaries = CartSummaryCache()
+search_index = ProductSearchIndex()
+bestseller_ranking = BestsellerRanking()
+trending = TrendingEngine()
+scheduler = Scheduler()
@@ -1,5 +1,7 @@
 from backend.extensions import db
 from datetime import datetime
+from sqlalchemy import select
+from sqlalchemy.exc import IntegrityError
 
 class Cart(db.Model):
     __tablename__ = 'cart'
@@ -9,5 +11,32 @@ class Cart(db.Model):
     created_date = db.Column(db.DateTime(timezone=True), default=datetime.utcnow)
     is_checked_out = db.Column(db.Boolean, default=False)
 
+    __table_args__ = (
+        db.Index('ix_cart_user_checked_out', 'user_id', 'is_checked_out'),
+        db.Index('uq_cart_user_active', 'user_id', unique=True,
+                 sqlite_where=db.text('is_checked_out = 0'),
+                 postgresql_where=db.text('is_checked_out = false'),
+                 mssql_where=db.text('is_checked_out = 0')),
+    )
+
     user = db.relationship('User', backref='carts', lazy=True)
     cart_details = db.relationship('CartDetails', backref='cart', lazy=True)
+
+    @staticmethod
+    def active_cart_query(user_id):
+        return select(Cart.id).where(Cart.user_id == user_id, Cart.is_checked_out == False)
+
+    @staticmethod
+    def get_or_create_active(user_id, cart_id=None):
+        """Return the user's open cart id, creating the cart in the caller's transaction."""
+        if cart_id is None:
+            cart_id = db.session.execute(Cart.active_cart_query(user_id)).scalar()
+        if cart_id is not None:
+            return cart_id
+        try:
+            with db.session.begin_nested():
+                result = db.session.execute(Cart.__table__.insert().values(user_id=user_id, is_checked_out=False))
+                return result.inserted_primary_key[0]
+        except IntegrityError:
+            # Another request opened the cart first; uq_cart_user_active allows only one.
+            return db.session.execute(Cart.active_cart_query(user_id)).scalar()
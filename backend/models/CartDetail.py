@@ -1,5 +1,7 @@
 from backend.extensions import db
 from datetime import datetime
+from sqlalchemy import bindparam, delete, select, update
+from sqlalchemy.exc import IntegrityError
 
 class CartDetails(db.Model):
     __tablename__ = 'cart_details'
@@ -11,6 +13,7 @@ class CartDetails(db.Model):
     price = db.Column(db.Numeric(10, 2), nullable=False)
     discount = db.Column(db.Numeric(5, 2), default=0.0)
     added_date = db.Column(db.DateTime(timezone=True), default=datetime.utcnow)
+    version = db.Column(db.Integer, nullable=False, default=1, server_default='1')
 
     __table_args__ = (
         db.CheckConstraint('quantity > 0', name='check_quantity_positive'),
@@ -18,3 +21,176 @@ class CartDetails(db.Model):
     )
 
     product = db.relationship('Product', backref='cart_details', lazy=True)
+
+    __mapper_args__ = {'version_id_col': version}
+
+    @staticmethod
+    def add_product(user_id, product_id, quantity):
+        """Add ``quantity`` of a product to the user's open cart in the caller's transaction.
+
+        Returns ``(status_code, message)`` where 0 means success, 1 an unknown or
+        inactive product, 2 insufficient stock and 3 an invalid quantity. The
+        product, the open cart and any quantity already in it are read in one
+        statement, and the line is upserted under UQ_Cart_Product: increment
+        first, insert when missing, and increment again if a concurrent insert
+        won the race. The increments only apply while the line stays within
+        stock, so concurrent adds cannot push it past stock either.
+        """
+        from backend.models.Cart import Cart
+        from backend.models.Product import Product
+
+        if not isinstance(quantity, int) or isinstance(quantity, bool) or quantity <= 0:
+            return 3, "Quantity must be a positive integer"
+
+        active_cart = Cart.active_cart_query(user_id).scalar_subquery()
+        product = db.session.execute(
+            select(
+                Product.price, Product.discount, Product.stock, Product.is_active, active_cart,
+                select(CartDetails.quantity).where(
+                    CartDetails.cart_id == active_cart, CartDetails.product_id == Product.id
+                ).scalar_subquery()
+            ).where(Product.id == product_id)
+        ).fetchone()
+        if not product or not product.is_active:
+            return 1, "Product not found"
+        if (product[5] or 0) + quantity > product.stock:
+            return 2, "Not enough stock available"
+
+        cart_id = Cart.get_or_create_active(user_id, product[4])
+        if CartDetails.increment(cart_id, product_id, quantity, product.stock):
+            return 0, "Product quantity updated in cart"
+        try:
+            with db.session.begin_nested():
+                db.session.execute(CartDetails.__table__.insert().values(
+                    cart_id=cart_id, product_id=product_id, quantity=quantity,
+                    price=product.price, discount=product.discount or 0
+                ))
+            return 0, "Product added to cart"
+        except IntegrityError:
+            # The line exists now, so a failed increment means it is at stock.
+            if CartDetails.increment(cart_id, product_id, quantity, product.stock):
+                return 0, "Product quantity updated in cart"
+            return 2, "Not enough stock available"
+
+    @staticmethod
+    def merge_items(user_id, items):
+        """Merge ``{product_id: quantity}`` into the user's open cart in the caller's transaction.
+
+        Unknown or inactive products are skipped and each line is capped at
+        stock, counting what the cart already holds. Existing lines are
+        incremented with one executemany UPDATE, guarded like ``increment`` so a
+        concurrent add cannot push them past stock, and new lines added with
+        one executemany INSERT; if a concurrent request
+        inserted one of them first, the lines fall back to ``add_product``.
+        Returns the number of products merged.
+        """
+        from backend.models.Cart import Cart
+        from backend.models.Product import Product
+
+        if not items:
+            return 0
+        products = db.session.execute(
+            select(Product.id, Product.price, Product.discount, Product.stock).where(
+                Product.id.in_(list(items)), Product.is_active == True, Product.stock > 0
+            )
+        ).fetchall()
+        if not products:
+            return 0
+
+        cart_id = Cart.get_or_create_active(user_id)
+        existing = dict(db.session.execute(
+            select(CartDetails.product_id, CartDetails.quantity).where(
+                CartDetails.cart_id == cart_id, CartDetails.product_id.in_([product.id for product in products])
+            )
+        ).fetchall())
+
+        updates, inserts = [], []
+        for product in products:
+            quantity = min(items[product.id], product.stock - existing.get(product.id, 0))
+            if quantity <= 0:
+                continue
+            if product.id in existing:
+                updates.append({"line_cart_id": cart_id, "line_product_id": product.id, "added": quantity,
+                                "line_stock": product.stock})
+            else:
+                inserts.append({"cart_id": cart_id, "product_id": product.id, "quantity": quantity,
+                                "price": product.price, "discount": product.discount or 0})
+
+        if updates:
+            db.session.execute(
+                update(CartDetails.__table__).where(
+                    CartDetails.cart_id == bindparam("line_cart_id"),
+                    CartDetails.product_id == bindparam("line_product_id"),
+                    CartDetails.quantity + bindparam("added") <= bindparam("line_stock")
+                ).values(quantity=CartDetails.quantity + bindparam("added"), version=CartDetails.version + 1),
+                updates
+            )
+        if inserts:
+            try:
+                with db.session.begin_nested():
+                    db.session.execute(CartDetails.__table__.insert(), inserts)
+            except IntegrityError:
+                for line in inserts:
+                    CartDetails.add_product(user_id, line["product_id"], line["quantity"])
+        return len(updates) + len(inserts)
+
+    @staticmethod
+    def increment(cart_id, product_id, quantity, stock=None):
+        conditions = [CartDetails.cart_id == cart_id, CartDetails.product_id == product_id]
+        if stock is not None:
+            conditions.append(CartDetails.quantity + quantity <= stock)
+        result = db.session.execute(
+            update(CartDetails.__table__).where(*conditions).values(quantity=CartDetails.quantity + quantity, version=CartDetails.version + 1)
+        )
+        return result.rowcount > 0
+
+    @staticmethod
+    def owned_by(user_id):
+        from backend.models.Cart import Cart
+        return CartDetails.cart_id.in_(select(Cart.id).where(Cart.user_id == user_id))
+
+    @staticmethod
+    def change_quantity(cart_item_id, change, scope, expected_version=None):
+        """Apply ``change`` to a line within ``scope`` unless the quantity would leave 1..stock.
+
+        ``scope`` is a condition such as ``CartDetails.cart_id == cart_id`` or
+        ``CartDetails.owned_by(user_id)``, so the ownership check, the bounds
+        check and the write are one atomic statement. Only increases are held
+        to stock, so a line left above stock by a stock cut can still shrink.
+        With ``expected_version`` the write is also a compare-and-swap against
+        the line's version.
+        """
+        from backend.models.Product import Product
+
+        conditions = [CartDetails.id == cart_item_id, scope, CartDetails.quantity + change > 0]
+        if change > 0:
+            stock = select(Product.stock).where(Product.id == CartDetails.product_id).scalar_subquery()
+            conditions.append(CartDetails.quantity + change <= stock)
+        if expected_version is not None:
+            conditions.append(CartDetails.version == expected_version)
+        result = db.session.execute(
+            update(CartDetails.__table__).where(*conditions).values(
+                quantity=CartDetails.quantity + change, version=CartDetails.version + 1
+            )
+        )
+        return result.rowcount > 0
+
+    @staticmethod
+    def remove_item(cart_item_id, scope, expected_version=None):
+        conditions = [CartDetails.id == cart_item_id, scope]
+        if expected_version is not None:
+            conditions.append(CartDetails.version == expected_version)
+        result = db.session.execute(delete(CartDetails.__table__).where(*conditions))
+        return result.rowcount > 0
+
+    @staticmethod
+    def line_owner(cart_item_id):
+        """Return ``(user_id, cart_id, version, quantity, stock)`` for a line; used only to explain a failed write."""
+        from backend.models.Cart import Cart
+        from backend.models.Product import Product
+        return db.session.execute(
+            select(Cart.user_id, Cart.id, CartDetails.version, CartDetails.quantity, Product.stock)
+            .join(CartDetails, CartDetails.cart_id == Cart.id)
+            .join(Product, Product.id == CartDetails.product_id)
+            .where(CartDetails.id == cart_item_id)
+        ).fetchone()
@@ -0,0 +1,19 @@
+from backend.extensions import db
+from datetime import datetime
+
+class IdempotencyKey(db.Model):
+    __tablename__ = 'idempotency_keys'
+
+    id = db.Column(db.Integer, primary_key=True, autoincrement=True)
+    idempotency_key = db.Column(db.String(255), nullable=False)
+    endpoint = db.Column(db.String(255), nullable=False)
+    user_id = db.Column(db.Integer, nullable=False, default=0)
+    request_hash = db.Column(db.String(64), nullable=False)
+    status_code = db.Column(db.Integer, nullable=True)
+    response_body = db.Column(db.Text, nullable=True)
+    created_at = db.Column(db.DateTime, nullable=False, default=datetime.utcnow)
+
+    __table_args__ = (
+        db.Index('uq_idempotency_keys_key', 'idempotency_key', 'endpoint', 'user_id', unique=True),
+        db.Index('ix_idempotency_keys_created_at', 'created_at'),
+    )
@@ -10,6 +10,7 @@ class Order(db.Model):
     total_amount = db.Column(db.Numeric(10, 2), nullable=False)
     shipping_address = db.Column(db.String(255), nullable=False)
     status = db.Column(db.String(20), nullable=False)
+    version = db.Column(db.Integer, nullable=False, default=1, server_default='1')
     
     __table_args__ = (
         db.CheckConstraint("status IN ('Pending', 'Shipped', 'Delivered')", name='check_status'),
@@ -17,3 +18,7 @@ class Order(db.Model):
     
     order_details = db.relationship('OrderDetail', backref='order', lazy=True)
     payment = db.relationship('Payment', backref='order', uselist=False)
+
+    # ORM updates become compare-and-swap on version and raise StaleDataError
+    # when another transaction changed the order first.
+    __mapper_args__ = {'version_id_col': version}
@@ -9,5 +9,11 @@ class OrderDetail(db.Model):
     quantity = db.Column(db.Integer, nullable=False)
     price = db.Column(db.Numeric(10, 2), nullable=False)
     discount = db.Column(db.Numeric(5, 2), nullable=True)
+
+    __table_args__ = (
+        db.Index('ix_order_details_order_id', 'order_id',
+                 mssql_include=['product_id', 'quantity', 'price', 'discount'],
+                 postgresql_include=['product_id', 'quantity', 'price', 'discount']),
+    )
     
     product = db.relationship('Product', backref='order_details')
@@ -3,6 +3,8 @@ from datetime import datetime
 
 class Payment(db.Model):
     __tablename__ = 'payments'
+
+    PAYMENT_METHODS = ('Credit Card', 'PayPal', 'Bank Transfer', 'Cash on Delivery', 'Gift Card')
     
     id = db.Column(db.Integer, primary_key=True, autoincrement=True)
     order_id = db.Column(db.Integer, db.ForeignKey('orders.id'))
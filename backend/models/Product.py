@@ -14,6 +14,13 @@ class Product(db.Model):
     discount = db.Column(db.Float, nullable=False, default=0)
     is_active = db.Column(db.Boolean, nullable=False, default=True)
 
+    __table_args__ = (
+        db.Index('uq_products_product_name', 'product_name', unique=True),
+        db.Index('ix_products_category_active', 'category_id', 'is_active', 'id',
+                 mssql_include=['product_name', 'price', 'stock', 'discount', 'image_url'],
+                 postgresql_include=['product_name', 'price', 'stock', 'discount', 'image_url']),
+    )
+
     category = db.relationship('Category', backref=db.backref('products', lazy=True))
     
     def __repr__(self):
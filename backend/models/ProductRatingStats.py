@@ -0,0 +1,82 @@
+from backend.extensions import db
+from sqlalchemy import text
+from sqlalchemy.exc import IntegrityError
+
+class ProductRatingStats(db.Model):
+    __tablename__ = 'product_rating_stats'
+
+    product_id = db.Column(db.Integer, db.ForeignKey('products.id'), primary_key=True)
+    review_count = db.Column(db.Integer, nullable=False, default=0)
+    rating_sum = db.Column(db.Integer, nullable=False, default=0)
+    rating_1 = db.Column(db.Integer, nullable=False, default=0)
+    rating_2 = db.Column(db.Integer, nullable=False, default=0)
+    rating_3 = db.Column(db.Integer, nullable=False, default=0)
+    rating_4 = db.Column(db.Integer, nullable=False, default=0)
+    rating_5 = db.Column(db.Integer, nullable=False, default=0)
+
+    @staticmethod
+    def apply_review(product_id, rating, delta):
+        """Add (delta=1) or remove (delta=-1) one rating in the caller's transaction.
+
+        The first review of a product inserts the stats row inside a savepoint;
+        if a concurrent first review inserted it already, the update is retried.
+        """
+        rating_column = f"rating_{int(rating)}"
+        params = {'product_id': product_id, 'rating': rating, 'delta': delta}
+        update_stats = text(f"""
+            UPDATE product_rating_stats
+            SET review_count = review_count + :delta,
+                rating_sum = rating_sum + :rating * :delta,
+                {rating_column} = {rating_column} + :delta
+            WHERE product_id = :product_id
+        """)
+        if db.session.execute(update_stats, params).rowcount or delta <= 0:
+            return
+        values = dict(product_id=product_id, review_count=1, rating_sum=rating,
+                      rating_1=0, rating_2=0, rating_3=0, rating_4=0, rating_5=0)
+        values[rating_column] = 1
+        try:
+            with db.session.begin_nested():
+                db.session.execute(ProductRatingStats.__table__.insert().values(**values))
+        except IntegrityError:
+            db.session.execute(update_stats, params)
+
+    @staticmethod
+    def rebuild():
+        db.session.execute(text("DELETE FROM product_rating_stats"))
+        db.session.execute(text("""
+            INSERT INTO product_rating_stats
+                (product_id, review_count, rating_sum, rating_1, rating_2, rating_3, rating_4, rating_5)
+            SELECT product_id,
+                   COUNT(rating),
+                   COALESCE(SUM(rating), 0),
+                   SUM(CASE WHEN rating = 1 THEN 1 ELSE 0 END),
+                   SUM(CASE WHEN rating = 2 THEN 1 ELSE 0 END),
+                   SUM(CASE WHEN rating = 3 THEN 1 ELSE 0 END),
+                   SUM(CASE WHEN rating = 4 THEN 1 ELSE 0 END),
+                   SUM(CASE WHEN rating = 5 THEN 1 ELSE 0 END)
+            FROM product_reviews
+            WHERE product_id IS NOT NULL AND rating IS NOT NULL
+            GROUP BY product_id
+        """))
+        db.session.commit()
+
+    @staticmethod
+    def summarize(review_count, rating_sum):
+        review_count = review_count or 0
+        average = round(float(rating_sum) / review_count, 1) if review_count else 0
+        return average, review_count
+
+    def to_dict(self):
+        average_rating, total_reviews = self.summarize(self.review_count, self.rating_sum)
+        return {
+            'average_rating': average_rating,
+            'total_reviews': total_reviews,
+            'histogram': {
+                '1': self.rating_1,
+                '2': self.rating_2,
+                '3': self.rating_3,
+                '4': self.rating_4,
+                '5': self.rating_5
+            }
+        }
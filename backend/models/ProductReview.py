@@ -9,10 +9,14 @@ class ProductReview(db.Model):
     user_id = db.Column(db.Integer, db.ForeignKey('users.id'))
     rating = db.Column(db.Integer)
     review_text = db.Column(db.Text)
-    review_date = db.Column(db.DateTime, default=datetime.utcnow)
+    created_at = db.Column(db.DateTime, default=datetime.utcnow)
+    image_url = db.Column(db.String(255), nullable=True)
     
     __table_args__ = (
         db.CheckConstraint('rating >= 1 AND rating <= 5', name='check_rating'),
+        db.Index('ix_product_reviews_product_created', 'product_id', 'created_at',
+                 mssql_include=['user_id', 'rating'], postgresql_include=['user_id', 'rating']),
+        db.Index('uq_product_reviews_product_user', 'product_id', 'user_id', unique=True),
     )
     
     product = db.relationship('Product', backref='reviews')
@@ -0,0 +1,9 @@
+from backend.extensions import db
+from datetime import datetime
+
+class ProductTrendingScore(db.Model):
+    __tablename__ = 'product_trending_scores'
+
+    product_id = db.Column(db.Integer, db.ForeignKey('products.id'), primary_key=True)
+    score = db.Column(db.Float, nullable=False)
+    updated_at = db.Column(db.DateTime, nullable=False, default=datetime.utcnow)
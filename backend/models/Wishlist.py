@@ -6,6 +6,10 @@ class Wishlist(db.Model):
     id = db.Column(db.Integer, primary_key=True)
     user_id = db.Column(db.Integer, db.ForeignKey("users.id"), nullable=False)
     product_id = db.Column(db.Integer, db.ForeignKey("products.id"), nullable=False)
+
+    __table_args__ = (
+        db.Index("uq_wishlist_user_product", "user_id", "product_id", unique=True),
+    )
     
     user = db.relationship("User", backref=db.backref("wishlist_items", lazy=True))
     product = db.relationship("Product", backref=db.backref("wishlist_entries", lazy=True))
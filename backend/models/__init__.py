@@ -1,9 +1,13 @@
 
 from .Cart import Cart
+from .CartDetail import CartDetails
 from .Category import Category
+from .IdempotencyKey import IdempotencyKey
 from .Order import Order
 from .OrderDetail import OrderDetail
 from .Payment import Payment
 from .Product import Product
+from .ProductRatingStats import ProductRatingStats
 from .ProductReview import ProductReview
+from .ProductTrendingScore import ProductTrendingScore
 from .User import User
@@ -6,3 +6,5 @@ from .payments import payment_bp
 
 from .checkout import checkout_bp
 from .admin import admin_bp
+from .bestsellers import bestsellers_bp
+from .wishlist import wishlist_bp
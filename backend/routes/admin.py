@@ -1,26 +1,36 @@
 from flask import Blueprint, request, jsonify, current_app
 from flask_wtf import FlaskForm
 from wtforms import StringField, FloatField, IntegerField
-from wtforms.validators import DataRequired, NumberRange
+from wtforms.validators import DataRequired, InputRequired, NumberRange
 from datetime import datetime
 
 import uuid
 import os
+import csv
+import json
 from werkzeug.security import generate_password_hash
 from werkzeug.utils import secure_filename
+from werkzeug.datastructures import MultiDict
 import logging
-from sqlalchemy import text
+from sqlalchemy import text, bindparam
 
 from backend.models.Product import Product
 from backend.models.Category import Category
 from backend.models.User import User
-from backend.extensions import db
+from backend.extensions import db, identity_cache, password_hasher, catalog_cache, search_cache, product_details_cache, cart_summaries, bestseller_ranking, trending, scheduler
 from backend.routes.auth import token_required
+from backend.utils.http import stream_json_list
+from backend.utils.serializers import RowMapper
+from backend.routes.products import index_product, build_search_index
 
 logger = logging.getLogger(__name__)
 
 admin_bp = Blueprint('admin', __name__)
 
+IMPORT_CHUNK_SIZE = 200
+BULK_UPDATE_MAX_IDS = 1000
+IMPORT_MAX_REPORTED_ERRORS = 1000
+
 def check_admin(user):
     return user.user_role.lower() == 'admin'
 
@@ -72,7 +82,7 @@ class UpdateDiscountForm(FlaskForm):
     new_discount = FloatField(
         "New Discount",
         validators=[
-            DataRequired(),
+            InputRequired(),
             NumberRange(min=0, max=100, message="Discount must be between 0 and 100"),
         ],
     )
@@ -278,6 +288,39 @@ def admin_dashboard(current_user):
         logger.error(traceback.format_exc())
         return jsonify({"message": f"Error: {str(e)}"}), 500
 
+@admin_bp.route("/admin/cache/stats", methods=["GET"])
+@token_required
+def admin_cache_stats(current_user):
+    if not check_admin(current_user):
+        logger.warning(f"Unauthorized access attempt for user_id: {current_user.id}")
+        return jsonify({"message": "Unauthorized access"}), 403
+
+    return jsonify({
+        "success": True,
+        "identity_cache": identity_cache.stats(),
+        "password_hasher": password_hasher.stats(),
+        "catalog_cache": catalog_cache.stats(),
+        "search_cache": search_cache.stats(),
+        "product_details_cache": product_details_cache.stats(),
+        "cart_summaries": cart_summaries.stats(),
+        "bestsellers": bestseller_ranking.stats(),
+        "trending": trending.stats(),
+        "scheduler": scheduler.stats()
+    }), 200
+
+def float_or_zero(value):
+    return float(value) if value is not None else 0.0
+
+ADMIN_PRODUCT_ROW = RowMapper(
+    "id", "product_name", "description", ("price", float_or_zero), ("stock", lambda stock: stock or 0),
+    "category_id", "image_url", ("is_active", lambda is_active: True if is_active is None else bool(is_active)),
+    ("discount", float_or_zero), "category_name"
+)
+
+ADMIN_USER_ROW = RowMapper(
+    "id", "username", "email", "full_name", "user_address", "phone_number", "user_role"
+)
+
 @admin_bp.route("/admin/products", methods=["GET"])
 @token_required
 def admin_get_products(current_user):
@@ -294,33 +337,11 @@ def admin_get_products(current_user):
                    p.category_id, p.image_url, p.is_active, p.discount, c.category_name
             FROM products p
             LEFT JOIN categories c ON p.category_id = c.id
-            ORDER BY p.id DESC""")
-        
-        products_result = db.session.execute(products_query).fetchall()
-        logger.info(f"Found {len(products_result) if products_result else 0} products")
-        
-        products = []
-        for row in products_result:
-            try:
-                logger.debug(f"Processing product row: {row}")
-                product = {
-                    "id": row.id,
-                    "product_name": row.product_name,
-                    "description": row.product_description,
-                    "price": float(row.price) if row.price is not None else 0.0,
-                    "stock": row.stock if row.stock is not None else 0,
-                    "category_id": row.category_id,
-                    "category_name": row.category_name,
-                    "image_url": row.image_url,
-                    "is_active": bool(row.is_active) if hasattr(row, 'is_active') else True,
-                    "discount": float(row.discount) if hasattr(row, 'discount') and row.discount is not None else 0.0
-                }
-                products.append(product)
-            except Exception as row_error:
-                logger.error(f"Error processing product row: {str(row_error)}")
-
-        logger.info(f"Returning {len(products)} products")
-        return jsonify({"success": True, "products": products}), 200
+            ORDER BY p.id DESC""").execution_options(stream_results=True)
+        
+        products_result = db.session.execute(products_query)
+        logger.info("Streaming admin product list")
+        return stream_json_list(products_result, "products", ADMIN_PRODUCT_ROW, success=True)
         
     except Exception as e:
         import traceback
@@ -345,29 +366,13 @@ def admin_get_users(current_user):
     
     try:
 
-        result = db.session.execute(text("SELECT id, username, email, full_name, user_address, phone_number, user_role FROM users")).fetchall()
-        
-        users = []
-        for row in result:
-            try:
-                user = {
-                    "id": row[0],
-                    "username": row[1],
-                    "email": row[2],
-                    "full_name": row[3],
-                    "user_address": row[4],
-                    "phone_number": row[5],
-                    "user_role": row[6]
-                }
-                users.append(user)
-            except Exception as row_error:
-                logger.error(f"Error processing user row: {str(row_error)}")
+        users_query = text(
+            "SELECT id, username, email, full_name, user_address, phone_number, user_role FROM users"
+        ).execution_options(stream_results=True)
 
-        logger.info(f"Returning {len(users)} users")
-        return jsonify({
-            "success": True,
-            "users": users
-        }), 200
+        result = db.session.execute(users_query)
+        logger.info("Streaming admin user list")
+        return stream_json_list(result, "users", ADMIN_USER_ROW, success=True)
         
     except Exception as e:
         import traceback
@@ -422,6 +427,8 @@ def toggle_product_visibility(current_user, product_id):
         )
         
         db.session.commit()
+        catalog_cache.bump()
+        index_product(product_id)
         logger.info(f"Product {product_id} visibility updated to {is_active}")
         return jsonify({"message": "Product visibility updated successfully"}), 200
         
@@ -503,6 +510,8 @@ def update_product(current_user, product_id):
         })
         
         db.session.commit()
+        catalog_cache.bump()
+        index_product(product_id)
         logger.info(f"Product {product_id} updated successfully")
         return jsonify({"success": True, "message": "Product updated successfully"}), 200
         
@@ -538,6 +547,7 @@ def delete_user(current_user, user_id):
         delete_query = text("DELETE FROM users WHERE id = :user_id")
         db.session.execute(delete_query, {"user_id": user_id})
         db.session.commit()
+        identity_cache.invalidate(user_id)
         
         logger.info(f"User {user_id} deleted successfully")
         return jsonify({
@@ -624,6 +634,7 @@ def update_user(current_user, user_id):
         
         db.session.execute(update_query, params)
         db.session.commit()
+        identity_cache.invalidate(user_id)
         
         logger.info(f"User {user_id} ({user.username}) updated successfully")
         return jsonify({
@@ -722,6 +733,7 @@ def add_product(current_user):
         })
         
         db.session.commit()
+        catalog_cache.bump()
         
         product_query = text("""
             SELECT id, product_name, product_description, price, stock, 
@@ -737,6 +749,7 @@ def add_product(current_user):
             logger.error("Product not found after adding")
             return jsonify({"success": False, "message": "Product not found after operation"}), 500
         
+        index_product(product[0])
         logger.info(f"Product added successfully: {product[0]}")
         return jsonify({
             "success": True,
@@ -762,3 +775,254 @@ def add_product(current_user):
         db.session.rollback()
         logger.error(f"Error adding product: {str(e)}")
         return jsonify({"success": False, "message": f"Error: {str(e)}"}), 500
+
+def iter_import_rows(stream, content_type):
+    lines = (line.decode("utf-8-sig") if isinstance(line, bytes) else line for line in stream)
+    if "csv" in content_type:
+        for row_number, row in enumerate(csv.DictReader(lines), start=1):
+            yield row_number, {key.strip(): (value or "").strip() for key, value in row.items() if key}, None
+        return
+
+    row_number = 0
+    for line in lines:
+        if not line.strip():
+            continue
+        row_number += 1
+        try:
+            row = json.loads(line)
+            if not isinstance(row, dict):
+                raise ValueError("Each line must be a JSON object")
+        except ValueError as e:
+            yield row_number, None, {"row": [f"Invalid JSON: {str(e)}"]}
+            continue
+        yield row_number, {key: "" if value is None else str(value).strip() for key, value in row.items()}, None
+
+def validate_import_row(row):
+    if not row.get("discount"):
+        row["discount"] = "0"
+    form = AddProductForm(formdata=MultiDict(row))
+    if not form.validate():
+        return None, form.errors
+    return {
+        "product_name": form.product_name.data.strip(),
+        "product_description": (form.description.data or "").strip(),
+        "price": form.price.data,
+        "stock": form.stock.data,
+        "category_id": form.category_id.data,
+        "image_url": (form.image_url.data or "").strip(),
+        "discount": form.discount.data,
+        "is_active": True,
+    }, None
+
+def insert_import_chunk(chunk, seen_names, report_error):
+    names = [product["product_name"] for _, product in chunk]
+    existing = {
+        row[0] for row in db.session.query(Product.product_name).filter(Product.product_name.in_(names)).all()
+    }
+
+    to_insert = []
+    for row_number, product in chunk:
+        if product["product_name"] in existing or product["product_name"] in seen_names:
+            report_error(row_number, {"product_name": ["Product with this name already exists"]})
+            continue
+        seen_names.add(product["product_name"])
+        to_insert.append(product)
+
+    if to_insert:
+        db.session.execute(Product.__table__.insert().values(to_insert))
+    db.session.commit()
+    return len(to_insert)
+
+@admin_bp.route("/admin/product/import", methods=["POST"])
+@token_required
+def import_products(current_user):
+    if not check_admin(current_user):
+        logger.warning(f"Unauthorized access attempt for user_id: {current_user.id}")
+        return jsonify({"success": False, "message": "Unauthorized access"}), 403
+
+    content_type = (request.content_type or "").lower()
+    if "csv" not in content_type and "json" not in content_type:
+        return jsonify({
+            "success": False,
+            "message": "Content-Type must be text/csv or application/x-ndjson"
+        }), 415
+
+    errors = []
+    counts = {"rows": 0, "imported": 0, "failed": 0}
+
+    def report_error(row_number, row_errors):
+        counts["failed"] += 1
+        if len(errors) < IMPORT_MAX_REPORTED_ERRORS:
+            errors.append({"row": row_number, "errors": row_errors})
+
+    try:
+        category_ids = {row[0] for row in db.session.query(Category.id).all()}
+        seen_names = set()
+        chunk = []
+
+        for row_number, row, parse_errors in iter_import_rows(request.stream, content_type):
+            counts["rows"] += 1
+            if parse_errors:
+                report_error(row_number, parse_errors)
+                continue
+
+            product, row_errors = validate_import_row(row)
+            if row_errors:
+                report_error(row_number, row_errors)
+                continue
+            if product["category_id"] not in category_ids:
+                report_error(row_number, {"category_id": ["Category does not exist"]})
+                continue
+
+            chunk.append((row_number, product))
+            if len(chunk) >= IMPORT_CHUNK_SIZE:
+                counts["imported"] += insert_import_chunk(chunk, seen_names, report_error)
+                chunk = []
+
+        if chunk:
+            counts["imported"] += insert_import_chunk(chunk, seen_names, report_error)
+
+    except Exception as e:
+        db.session.rollback()
+        logger.error(f"Error importing products after {counts['imported']} rows: {str(e)}")
+        return jsonify({
+            "success": False,
+            "message": f"Error: {str(e)}",
+            "imported": counts["imported"],
+            "failed": counts["failed"],
+            "errors": errors
+        }), 500
+    finally:
+        if counts["imported"]:
+            catalog_cache.bump()
+            build_search_index()
+
+    errors.sort(key=lambda error: error["row"])
+    logger.info(f"Imported {counts['imported']} of {counts['rows']} product rows")
+    return jsonify({
+        "success": counts["failed"] == 0,
+        "message": f"Imported {counts['imported']} of {counts['rows']} products",
+        "rows": counts["rows"],
+        "imported": counts["imported"],
+        "failed": counts["failed"],
+        "errors": errors
+    }), 200
+
+def json_formdata(data, *fields):
+    return MultiDict({field: str(data[field]) for field in fields if data.get(field) is not None})
+
+def bulk_update_target(data):
+    category_id = data.get("category_id")
+    product_ids = data.get("product_ids")
+
+    if (category_id is None) == (product_ids is None):
+        return None, None, "Provide exactly one of category_id or product_ids"
+
+    if category_id is not None:
+        try:
+            return "category_id = :category_id", {"category_id": int(category_id)}, None
+        except (TypeError, ValueError):
+            return None, None, "category_id must be an integer"
+
+    if not isinstance(product_ids, list) or not product_ids:
+        return None, None, "product_ids must be a non-empty list"
+    if len(product_ids) > BULK_UPDATE_MAX_IDS:
+        return None, None, f"At most {BULK_UPDATE_MAX_IDS} product_ids per request"
+    try:
+        ids = sorted({int(product_id) for product_id in product_ids})
+    except (TypeError, ValueError):
+        return None, None, "product_ids must be integers"
+    return "id IN :product_ids", {"product_ids": ids}, None
+
+def run_bulk_product_update(set_clause, params, data, description):
+    where_clause, target_params, error = bulk_update_target(data)
+    if error:
+        return jsonify({"success": False, "message": error}), 400
+
+    try:
+        query = text(f"UPDATE products SET {set_clause} WHERE {where_clause}")
+        if "product_ids" in target_params:
+            query = query.bindparams(bindparam("product_ids", expanding=True))
+        result = db.session.execute(query, {**params, **target_params})
+        affected = result.rowcount
+        db.session.commit()
+        catalog_cache.bump()
+
+        logger.info(f"Bulk {description} update affected {affected} products")
+        return jsonify({
+            "success": True,
+            "message": f"Bulk {description} update applied",
+            "affected": affected
+        }), 200
+
+    except Exception as e:
+        db.session.rollback()
+        logger.error(f"Error applying bulk {description} update: {str(e)}")
+        return jsonify({"success": False, "message": f"Error: {str(e)}"}), 500
+
+@admin_bp.route("/admin/products/bulk/price", methods=["POST"])
+@token_required
+def bulk_update_price(current_user):
+    if not check_admin(current_user):
+        logger.warning(f"Unauthorized access attempt for user_id: {current_user.id}")
+        return jsonify({"success": False, "message": "Unauthorized access"}), 403
+
+    if not request.is_json:
+        return jsonify({"success": False, "message": "Invalid JSON format"}), 400
+
+    data = request.get_json()
+    if not isinstance(data, dict):
+        return jsonify({"success": False, "message": "Request body must be a JSON object"}), 400
+    form = UpdatePriceForm(formdata=json_formdata(data, "new_price"))
+    if not form.validate():
+        return jsonify({"success": False, "message": "Invalid price", "errors": form.errors}), 400
+
+    return run_bulk_product_update(
+        "price = :new_price", {"new_price": form.new_price.data}, data, "price"
+    )
+
+@admin_bp.route("/admin/products/bulk/discount", methods=["POST"])
+@token_required
+def bulk_update_discount(current_user):
+    if not check_admin(current_user):
+        logger.warning(f"Unauthorized access attempt for user_id: {current_user.id}")
+        return jsonify({"success": False, "message": "Unauthorized access"}), 403
+
+    if not request.is_json:
+        return jsonify({"success": False, "message": "Invalid JSON format"}), 400
+
+    data = request.get_json()
+    if not isinstance(data, dict):
+        return jsonify({"success": False, "message": "Request body must be a JSON object"}), 400
+    form = UpdateDiscountForm(formdata=json_formdata(data, "new_discount"))
+    if not form.validate():
+        return jsonify({"success": False, "message": "Invalid discount", "errors": form.errors}), 400
+
+    return run_bulk_product_update(
+        "discount = :new_discount", {"new_discount": form.new_discount.data}, data, "discount"
+    )
+
+@admin_bp.route("/admin/products/bulk/stock", methods=["POST"])
+@token_required
+def bulk_update_stock(current_user):
+    if not check_admin(current_user):
+        logger.warning(f"Unauthorized access attempt for user_id: {current_user.id}")
+        return jsonify({"success": False, "message": "Unauthorized access"}), 403
+
+    if not request.is_json:
+        return jsonify({"success": False, "message": "Invalid JSON format"}), 400
+
+    data = request.get_json()
+    if not isinstance(data, dict):
+        return jsonify({"success": False, "message": "Request body must be a JSON object"}), 400
+    try:
+        stock_delta = int(data.get("stock_delta"))
+    except (TypeError, ValueError):
+        return jsonify({"success": False, "message": "stock_delta must be an integer"}), 400
+
+    return run_bulk_product_update(
+        "stock = CASE WHEN stock + :stock_delta < 0 THEN 0 ELSE stock + :stock_delta END",
+        {"stock_delta": stock_delta},
+        data,
+        "stock"
+    )
@@ -1,19 +1,38 @@
 from flask import Blueprint, request, jsonify
-from backend.extensions import db
+from backend.extensions import db, identity_cache, password_hasher, cart_summaries
+from backend.utils.password_hasher import HashingPoolFull
 from backend.models import User
 from backend.models import Order
+from backend.models import CartDetails
+from backend.utils.guest_cart import InvalidGuestCart, load_guest_cart
+from sqlalchemy.exc import SQLAlchemyError
 import jwt
 import logging
 import datetime
 from flask import current_app as app
 from functools import wraps
-from werkzeug.security import generate_password_hash, check_password_hash
 
 auth_bp = Blueprint("auth", __name__)
 
 logging.basicConfig(level=logging.DEBUG)
 logger = logging.getLogger(__name__)
 
+def merge_guest_cart(user_id, token):
+    """Fold a signed guest cart into the user's DB cart; login never fails because of it."""
+    if not token:
+        return 0
+    try:
+        merged = CartDetails.merge_items(user_id, load_guest_cart(token))
+        db.session.commit()
+        if merged:
+            cart_summaries.invalidate(user_id)
+        logger.info(f"Merged {merged} guest cart products into cart of user {user_id}")
+        return merged
+    except (InvalidGuestCart, SQLAlchemyError) as e:
+        db.session.rollback()
+        logger.warning(f"Could not merge guest cart for user {user_id}: {str(e)}")
+        return 0
+
 @auth_bp.route("/signup", methods=["POST"])
 def signup():
     try:
@@ -39,7 +58,7 @@ def signup():
             logger.warning(f"Invalid role value: {user_role}")
             return jsonify({"message": "Invalid role value"}), 400
 
-        hashed_password = generate_password_hash(password)
+        hashed_password = password_hasher.generate(password)
 
         new_user = User(
             username=username,
@@ -55,6 +74,9 @@ def signup():
         db.session.commit()
         return jsonify({"message": "User created successfully"}), 201
 
+    except HashingPoolFull as e:
+        logger.warning(f"Signup rejected: {str(e)}")
+        return jsonify({"message": "Server is busy, please retry shortly"}), 503, {"Retry-After": "1"}
     except Exception as e:
         print("Error occurred:", str(e))
         return jsonify({"message": "Internal Server Error"}), 500
@@ -82,7 +104,7 @@ def login():
             admin_user = User.query.filter_by(username="admin").first()
             if not admin_user:
                 
-                hashed_password = generate_password_hash("admin")
+                hashed_password = password_hasher.generate("admin")
                 admin_user = User(
                     username="admin",
                     pass_word=hashed_password,
@@ -105,6 +127,7 @@ def login():
 
             admin_response = {
                 "token": token,
+                "guest_cart_merged": merge_guest_cart(admin_user.id, data.get("guest_cart")),
                 "user": {
                     "id": admin_user.id,
                     "username": admin_user.username,
@@ -118,7 +141,7 @@ def login():
 
         user = User.query.filter_by(username=username).first()
 
-        if user and check_password_hash(user.pass_word, password):
+        if user and password_hasher.check(user.pass_word, password):
 
             token = jwt.encode(
                 {
@@ -132,6 +155,7 @@ def login():
             
             user_response = {
                 "token": token,
+                "guest_cart_merged": merge_guest_cart(user.id, data.get("guest_cart")),
                 "user": {
                     "id": user.id,
                     "username": user.username,
@@ -147,6 +171,9 @@ def login():
             logger.warning(f"Invalid credentials for username: {username}")
             return jsonify({"message": "Invalid credentials"}), 401
 
+    except HashingPoolFull as e:
+        logger.warning(f"Login rejected: {str(e)}")
+        return jsonify({"message": "Server is busy, please retry shortly"}), 503, {"Retry-After": "1"}
     except Exception as e:
         logger.error(f"Login error: {str(e)}")
         return jsonify({"message": "Internal Server Error"}), 500
@@ -172,10 +199,14 @@ def token_required(f):
         try:
             data = jwt.decode(token, app.config["SECRET_KEY"], algorithms=["HS256"])
             logger.debug(f"Decoded token data: {data}")
-            current_user = User.query.get(data["user_id"])
+            current_user = identity_cache.get(data["user_id"], token)
             if current_user is None:
-                logger.warning(f"User not found for ID: {data['user_id']}")
-                return jsonify({"message": "User not found"}), 401
+                generation = identity_cache.generation(data["user_id"])
+                user = User.query.get(data["user_id"])
+                if user is None:
+                    logger.warning(f"User not found for ID: {data['user_id']}")
+                    return jsonify({"message": "User not found"}), 401
+                current_user = identity_cache.set(data["user_id"], token, user, generation)
         except jwt.ExpiredSignatureError:
             logger.warning("Token has expired")
             return jsonify({"message": "Token has expired!"}), 401
@@ -205,12 +236,13 @@ def logout(current_user):
 @token_required
 def profile(current_user):
     try:
+        user = User.query.get(current_user.id)
         user_data = {
-            "id": current_user.id,
-            "username": current_user.username,
-            "email": current_user.email,
-            "phone": current_user.phone_number,
-            "address": current_user.user_address,
+            "id": user.id,
+            "username": user.username,
+            "email": user.email,
+            "phone": user.phone_number,
+            "address": user.user_address,
             "number_of_orders": Order.query.filter_by(user_id=current_user.id).count(),
         }
 
@@ -1,56 +1,142 @@
-from flask import Blueprint, jsonify
-from sqlalchemy import text
-from backend.extensions import db
+from flask import Blueprint, jsonify, json, request
+from sqlalchemy import bindparam, func, update
+from backend.extensions import db, catalog_cache, bestseller_ranking, trending
+from backend.models import Product, Category, Order, OrderDetail, ProductTrendingScore
+from backend.utils.http import conditional_json_response
+from backend.utils.serializers import RowMapper
+import datetime
 import logging
+import time
 
 logger = logging.getLogger(__name__)
 
 bestsellers_bp = Blueprint('bestsellers', __name__)
 
+DEFAULT_BESTSELLERS = 8
+
+BESTSELLER_ROW = RowMapper(
+    "id", "name", "description", "price", ("discount_percentage", lambda discount: discount or 0),
+    "stock_quantity", "image_url", "category_id", "category_name"
+)
+
+def refresh_bestsellers():
+    with bestseller_ranking.refresh_lock:
+        query = db.session.query(
+            Order.id, OrderDetail.product_id, OrderDetail.quantity, Order.order_date
+        ).join(
+            OrderDetail, OrderDetail.order_id == Order.id
+        ).filter(
+            Order.id > bestseller_ranking.scan_from()
+        )
+
+        max_order_id = None
+        if not bestseller_ranking.loaded:
+            max_order_id = db.session.query(func.max(Order.id)).scalar() or 0
+            window_start = datetime.datetime.combine(bestseller_ranking.window_start(), datetime.time.min)
+            query = query.filter(Order.id <= max_order_id, Order.order_date >= window_start)
+
+        rows = query.order_by(Order.id).all()
+        bestseller_ranking.apply(rows, last_order_id=max_order_id)
+        logger.debug(f"Bestsellers refreshed with {len(rows)} new order lines")
+
+def load_trending():
+    rows = db.session.query(
+        ProductTrendingScore.product_id, ProductTrendingScore.score, ProductTrendingScore.updated_at
+    ).all()
+    epoch = datetime.datetime(1970, 1, 1)
+    trending.load((product_id, score, (updated_at - epoch).total_seconds()) for product_id, score, updated_at in rows)
+    logger.debug(f"Loaded {len(rows)} trending scores from snapshot")
+
+def snapshot_trending():
+    """Add this process's activity since the last snapshot to the stored trending scores.
+
+    Each worker only adds its own new activity, per product, to the decayed
+    stored score, so workers sharing the table never overwrite each other.
+    The rows are locked while they are updated; if the write fails, the
+    activity is kept for the next snapshot.
+    """
+    taken_at = time.time()
+    scores = dict(trending.snapshot(taken_at))
+    if not scores:
+        return 0
+    saved_at = datetime.datetime.utcfromtimestamp(taken_at)
+    try:
+        stored = db.session.query(
+            ProductTrendingScore.product_id, ProductTrendingScore.score, ProductTrendingScore.updated_at
+        ).filter(ProductTrendingScore.product_id.in_(list(scores))).with_for_update().all()
+        updates = [
+            {'row_product_id': product_id,
+             'score': trending.decayed(score, (saved_at - updated_at).total_seconds()) + scores[product_id],
+             'updated_at': saved_at}
+            for product_id, score, updated_at in stored
+        ]
+        if updates:
+            db.session.execute(
+                update(ProductTrendingScore.__table__).where(
+                    ProductTrendingScore.product_id == bindparam('row_product_id')
+                ),
+                updates
+            )
+        existing = {product_id for product_id, _, _ in stored}
+        inserts = [
+            {'product_id': product_id, 'score': score, 'updated_at': saved_at}
+            for product_id, score in scores.items() if product_id not in existing
+        ]
+        if inserts:
+            db.session.execute(ProductTrendingScore.__table__.insert(), inserts)
+        db.session.commit()
+    except Exception:
+        db.session.rollback()
+        trending.restore(scores.items(), taken_at)
+        raise
+    logger.debug(f"Snapshotted trending activity for {len(scores)} products")
+    return len(scores)
+
+def bestseller_products_query():
+    return db.session.query(
+        Product.id, Product.product_name, Product.product_description, Product.price, Product.discount,
+        Product.stock, Product.image_url, Product.category_id, Category.category_name
+    ).outerjoin(
+        Category, Product.category_id == Category.id
+    ).filter(
+        Product.is_active == True
+    )
+
 @bestsellers_bp.route('/bestsellers', methods=['GET'])
 def get_bestsellers():
     try:
-        logger.info("Bestsellers endpoint called")
-        
-        test_query = text("SELECT 1 AS test")
-        test_result = db.session.execute(test_query).fetchone()
-        logger.info(f"Test query result: {test_result}")
-        
-        schema_query = text("""
-            SELECT TOP 1 * FROM products
-        """)
-        schema_result = db.session.execute(schema_query).fetchone()
-        logger.info(f"Available columns: {schema_result.keys()}")
-        
-        products_query = text("""
-            SELECT TOP 8 p.id, p.product_name, p.product_description, p.price, 
-                   ISNULL(p.discount, 0) as discount, 
-                   p.stock, p.image_url, 
-                   p.category_id, c.category_name
-            FROM products p
-            LEFT JOIN categories c ON p.category_id = c.id
-            WHERE p.is_active = 1
-            ORDER BY p.id DESC
-        """)
-        
-        products_result = db.session.execute(products_query).fetchall()
-        
+        limit = request.args.get('limit', default=DEFAULT_BESTSELLERS, type=int)
+        limit = max(1, min(limit, bestseller_ranking.max_size))
+
+        if not bestseller_ranking.loaded:
+            refresh_bestsellers()
+
+        cache_key = ('bestsellers', bestseller_ranking.version, limit)
+        cached = catalog_cache.get(cache_key)
+        if cached is not None:
+            return conditional_json_response(*cached)
+
+        version = catalog_cache.version
+        ranking = bestseller_ranking.top(limit)
+
         products = []
-        for product in products_result:
-            products.append({
-                'id': product[0],
-                'name': product[1],
-                'description': product[2],
-                'price': float(product[3]),
-                'discount_percentage': float(product[4]),
-                'stock_quantity': product[5],
-                'image_url': product[6],
-                'category_id': product[7],
-                'category_name': product[8]
-            })
-        
+        if ranking:
+            rows = bestseller_products_query().filter(Product.id.in_([product_id for product_id, _ in ranking])).all()
+            rows_by_id = {row[0]: row for row in rows}
+            for product_id, units_sold in ranking:
+                if product_id in rows_by_id:
+                    product = BESTSELLER_ROW(rows_by_id[product_id])
+                    product['units_sold'] = units_sold
+                    products.append(product)
+
+        if not products:
+            logger.info("No sales in the bestseller window, falling back to newest products")
+            rows = bestseller_products_query().order_by(Product.id.desc()).limit(limit).all()
+            products = BESTSELLER_ROW.many(rows)
+
         logger.info(f"Returning {len(products)} bestseller products")
-        return jsonify({'products': products}), 200
+        body = json.dumps({'products': products})
+        return conditional_json_response(*catalog_cache.set(cache_key, body, version))
         
     except Exception as e:
         logger.error(f"Error in bestsellers endpoint: {str(e)}")
@@ -60,3 +146,31 @@ def get_bestsellers():
             'error': str(e),
             'products': []
         }), 200
+
+@bestsellers_bp.route('/trending', methods=['GET'])
+def get_trending():
+    try:
+        limit = request.args.get('limit', default=DEFAULT_BESTSELLERS, type=int)
+        limit = max(1, min(limit, trending.max_size))
+
+        ranking = trending.top(limit)
+        products = []
+        if ranking:
+            rows = bestseller_products_query().filter(Product.id.in_([product_id for product_id, _ in ranking])).all()
+            rows_by_id = {row[0]: row for row in rows}
+            for product_id, score in ranking:
+                if product_id in rows_by_id:
+                    product = BESTSELLER_ROW(rows_by_id[product_id])
+                    product['trend_score'] = round(score, 3)
+                    products.append(product)
+
+        logger.info(f"Returning {len(products)} trending products")
+        return jsonify({'products': products}), 200
+
+    except Exception as e:
+        logger.error(f"Error in trending endpoint: {str(e)}")
+        return jsonify({
+            'message': 'Failed to fetch trending products',
+            'error': str(e),
+            'products': []
+        }), 200
@@ -1,10 +1,15 @@
 from flask import Blueprint, request, jsonify
+from flask import current_app as app
+from sqlalchemy import bindparam, delete, exists, select, text
 from sqlalchemy.exc import SQLAlchemyError
 from backend.routes.auth import token_required
-from backend.extensions import db
+from backend.extensions import db, trending, catalog_cache, cart_summaries
 from backend.models import Cart
-from backend.models import CartDetail
-from decimal import Decimal
+from backend.models import CartDetails
+from backend.utils.guest_cart import MAX_LINE_QUANTITY, InvalidGuestCart, dump_guest_cart, load_guest_cart
+from backend.utils.serializers import RowMapper
+from backend.utils.trending import CART_WEIGHT
+import datetime
 import logging
 
 logging.basicConfig(level=logging.DEBUG)
@@ -12,6 +17,101 @@ logger = logging.getLogger(__name__)
 
 cart_bp = Blueprint("cart", __name__)
 
+CART_BATCH_MAX_OPERATIONS = 100
+
+CART_ITEMS_QUERY = text("""
+SELECT 
+    cd.id as cart_item_id,
+    p.id as product_id,
+    p.product_name,
+    cd.quantity,
+    p.price as unit_price,
+    p.discount,
+    (p.price * (1 - p.discount/100.0) * cd.quantity) as item_total,
+    cd.version
+FROM 
+    cart_details cd
+JOIN 
+    products p ON cd.product_id = p.id
+WHERE 
+    cd.cart_id = :cart_id
+""")
+
+CART_ITEM_ROW = RowMapper(
+    "cart_item_id", "product_id", "product_name", "quantity",
+    ("unit_price", float), ("discount", float), ("item_total", float), "version"
+)
+
+CART_SUMMARY_QUERY = text("""
+SELECT COUNT(cd.id), COALESCE(SUM(cd.quantity), 0),
+       COALESCE(SUM(p.price * (1 - p.discount/100.0) * cd.quantity), 0)
+FROM cart c
+JOIN cart_details cd ON cd.cart_id = c.id
+JOIN products p ON cd.product_id = p.id
+WHERE c.user_id = :user_id AND c.is_checked_out = 0
+""")
+
+def summarize_items(items, total_price):
+    return {
+        "line_count": len(items),
+        "item_count": sum(item["quantity"] for item in items),
+        "total_price": total_price
+    }
+
+def compact_abandoned_carts():
+    """Delete open carts idle for CART_IDLE_DAYS, one short transaction per keyset batch.
+
+    A cart is idle when it was created before the cutoff and none of its lines
+    were added after it. Both deletes re-check that predicate, so a cart that
+    is checked out or gets a new line after the batch is selected is kept.
+    Returns the rows reclaimed so the scheduler can report them.
+    """
+    cutoff = datetime.datetime.utcnow() - datetime.timedelta(days=app.config["CART_IDLE_DAYS"])
+    batch_size = app.config["CART_COMPACTION_BATCH_SIZE"]
+    recent_lines = CartDetails.__table__.alias("recent_lines")
+    recent_line = exists().where(recent_lines.c.cart_id == Cart.id, recent_lines.c.added_date >= cutoff)
+    idle = (Cart.is_checked_out == False, Cart.created_date < cutoff, ~recent_line)
+    reclaimed = {"carts": 0, "cart_details": 0, "batches": 0}
+    last_id = 0
+
+    while True:
+        batch = db.session.execute(
+            select(Cart.id, Cart.user_id).where(Cart.id > last_id, *idle).order_by(Cart.id).limit(batch_size)
+        ).fetchall()
+        if not batch:
+            break
+
+        cart_ids = [cart_id for cart_id, _ in batch]
+        last_id = cart_ids[-1]
+        try:
+            idle_ids = select(Cart.id).where(Cart.id.in_(cart_ids), *idle)
+            deleted_lines = db.session.execute(
+                delete(CartDetails.__table__).where(CartDetails.cart_id.in_(idle_ids))
+            )
+            # A line added between the two deletes also fails recent_line.
+            carts = db.session.execute(delete(Cart.__table__).where(Cart.id.in_(cart_ids), *idle))
+            db.session.commit()
+        except SQLAlchemyError as e:
+            db.session.rollback()
+            logger.warning(f"Skipping cart compaction batch ending at cart {last_id}: {str(e)}")
+            continue
+
+        for _, user_id in batch:
+            cart_summaries.invalidate(user_id)
+        reclaimed["carts"] += carts.rowcount
+        reclaimed["cart_details"] += deleted_lines.rowcount
+        reclaimed["batches"] += 1
+        if len(batch) < batch_size:
+            break
+
+    logger.info(f"Cart compaction reclaimed {reclaimed['carts']} carts and {reclaimed['cart_details']} cart lines")
+    return reclaimed
+
+def cart_contents(cart_id):
+    items = CART_ITEM_ROW.many(db.session.execute(CART_ITEMS_QUERY, {"cart_id": cart_id}))
+    total_price = round(sum(item["item_total"] for item in items), 2)
+    return items, total_price
+
 @cart_bp.route("/cart/add", methods=["POST"])
 @token_required
 def add_to_cart(current_user):
@@ -27,21 +127,22 @@ def add_to_cart(current_user):
         logger.error("Missing product_id or quantity in request")
         return jsonify({"message": "Product ID and quantity are required"}), 400
     try:
-        result = db.session.execute(
-            "EXEC AddToCart @UserID=:user_id, @ProductID=:product_id, @Quantity=:quantity",
-            {
-                "user_id": current_user.id,
-                "product_id": product_id,
-                "quantity": quantity,
-            },
-        )
-        row = result.fetchone()
-        status_code = row[0]
-        message = row[1]
+        quantity = int(quantity)
+    except (TypeError, ValueError):
+        logger.error(f"Invalid quantity {quantity} in request")
+        return jsonify({"message": "Quantity must be a positive integer"}), 400
+    try:
+        status_code, message = CartDetails.add_product(current_user.id, product_id, quantity)
+        if status_code != 0:
+            db.session.rollback()
+            logger.warning(f"Could not add product {product_id} to cart for user {current_user.id}: {message}")
+            return jsonify({"success": False, "message": message})
 
         db.session.commit()
+        cart_summaries.invalidate(current_user.id)
+        trending.record(int(product_id), CART_WEIGHT)
         logger.info(f"Product {product_id} added to cart for user {current_user.id}")
-        return jsonify({"success": status_code == 0, "message": message})
+        return jsonify({"success": True, "message": message})
     except SQLAlchemyError as e:
         db.session.rollback()
         logger.error(
@@ -79,27 +180,9 @@ def view_cart(current_user):
         cart_id = cart[0]
         logger.debug(f"Found active cart with ID: {cart_id} for user {current_user.id}")
         
-        items_query = """
-        SELECT 
-            cd.id as cart_item_id,
-            p.id as product_id,
-            p.product_name,
-            cd.quantity,
-            p.price as unit_price,
-            p.discount,
-            (p.price * (1 - p.discount/100.0) * cd.quantity) as item_total
-        FROM 
-            cart_details cd
-        JOIN 
-            products p ON cd.product_id = p.id
-        WHERE 
-            cd.cart_id = :cart_id
-        """
-        
-        items_result = db.session.execute(items_query, {"cart_id": cart_id})
-        items = items_result.fetchall()
-        
-        if not items:
+        formatted_items, total_price = cart_contents(cart_id)
+
+        if not formatted_items:
             logger.info(f"Cart {cart_id} is empty for user {current_user.id}")
             return jsonify({
                 "success": True,
@@ -108,34 +191,12 @@ def view_cart(current_user):
                 "total_price": 0
             }), 200
             
-        formatted_items = []
-        total_price = 0
-        
-        for item in items:
-
-            logger.debug(f"Raw cart item data: {item}")
-            
-            item_dict = {
-                "cart_item_id": item[0],
-                "product_id": item[1],
-                "product_name": item[2],
-                "quantity": item[3],
-                "unit_price": float(item[4]) if isinstance(item[4], Decimal) else item[4],
-                "discount": float(item[5]) if isinstance(item[5], Decimal) else item[5],
-                "item_total": float(item[6]) if isinstance(item[6], Decimal) else item[6]
-            }
-            
-            logger.debug(f"Formatted cart item: {item_dict}")
-            
-            formatted_items.append(item_dict)
-            total_price += item_dict["item_total"]
-            
         logger.info(f"Retrieved {len(formatted_items)} items for cart {cart_id}")
         return jsonify({
             "success": True,
             "message": "Cart retrieved successfully",
             "data": formatted_items,
-            "total_price": round(total_price, 2)
+            "total_price": total_price
         }), 200
         
     except Exception as e:
@@ -147,6 +208,21 @@ def view_cart(current_user):
             "error_type": type(e).__name__
         }), 500
 
+def cart_item_failure(cart_item_id, user_id, cart_id=None, expected_version=None, change=None):
+    """Explain why a scoped cart line write touched no row, as (message, status_code)."""
+    owner = CartDetails.line_owner(cart_item_id)
+    if not owner:
+        return f"Cart item with ID {cart_item_id} not found", 404
+    if owner[0] != user_id:
+        return "Unauthorized access to cart item", 403
+    if cart_id is not None and owner[1] != cart_id:
+        return f"Cart item with ID {cart_item_id} not found", 404
+    if expected_version is not None and owner[2] != expected_version:
+        return "Cart item was changed by another request", 409
+    if change is not None and change > 0 and owner[3] + change > owner[4]:
+        return "Not enough stock available", 400
+    return "Quantity must be greater than 0", 400
+
 @cart_bp.route("/cart/update", methods=["POST"])
 @token_required
 def update_cart_item_quantity(current_user):
@@ -156,73 +232,36 @@ def update_cart_item_quantity(current_user):
 
     try:
         data = request.get_json()
-        logger.debug(f"Received data: {data}")
-        
         cart_item_id = data.get("cart_item_id")
-        change = data.get("change")
-        
-        logger.debug(f"Extracted cart_item_id: {cart_item_id}, change: {change}")
+        change = parse_int(data.get("change"))
+        expected_version = parse_int(data.get("version"))
 
         if not cart_item_id or change is None:
             logger.error("Missing cart_item_id or change in request")
             return jsonify({"success": False, "message": "Cart item ID and change value are required"}), 400
 
-        cart_item_check = db.session.execute(
-            "SELECT id FROM cart_details WHERE id = :cart_item_id",
-            {"cart_item_id": cart_item_id}
-        ).fetchone()
-        
-        if not cart_item_check:
-            logger.error(f"Cart item with ID {cart_item_id} not found")
-            return jsonify({"success": False, "message": f"Cart item with ID {cart_item_id} not found"}), 404
-
-        cart_check_query = """
-        SELECT c.user_id 
-        FROM cart_details cd
-        JOIN cart c ON cd.cart_id = c.id
-        WHERE cd.id = :cart_item_id
-        """
-        
-        cart_check = db.session.execute(
-            cart_check_query,
-            {"cart_item_id": cart_item_id},
-        ).fetchone()
-        
-        logger.debug(f"Cart check result: {cart_check}")
-
-        if not cart_check:
-            logger.error(f"Cart item with ID {cart_item_id} not found in any cart")
-            return jsonify({"success": False, "message": "Cart item not found"}), 404
-            
-        if cart_check[0] != current_user.id:
-            logger.warning(
-                f"Unauthorized attempt to update cart item {cart_item_id} by user {current_user.id}"
+        scope = CartDetails.owned_by(current_user.id)
+        if not CartDetails.change_quantity(cart_item_id, change, scope, expected_version):
+            db.session.rollback()
+            message, status_code = cart_item_failure(
+                cart_item_id, current_user.id, expected_version=expected_version, change=change
             )
-            return jsonify({"success": False, "message": "Unauthorized access to cart item"}), 403
+            logger.warning(f"Cart item {cart_item_id} not updated for user {current_user.id}: {message}")
+            return jsonify({"success": False, "message": message}), status_code
 
-        current_quantity = db.session.execute(
-            "SELECT quantity FROM cart_details WHERE id = :cart_item_id",
+        new_quantity, new_version = db.session.execute(
+            text("SELECT quantity, version FROM cart_details WHERE id = :cart_item_id"),
             {"cart_item_id": cart_item_id}
-        ).scalar()
-        
-        new_quantity = current_quantity + change
-        
-        if new_quantity <= 0:
-            logger.warning(f"Invalid new quantity {new_quantity} for cart item {cart_item_id}")
-            return jsonify({"success": False, "message": "Quantity must be greater than 0"}), 400
-            
-        db.session.execute(
-            "UPDATE cart_details SET quantity = :new_quantity WHERE id = :cart_item_id",
-            {"cart_item_id": cart_item_id, "new_quantity": new_quantity}
-        )
-        
+        ).fetchone()
         db.session.commit()
+        cart_summaries.invalidate(current_user.id)
         logger.info(f"Updated quantity for cart item {cart_item_id} to {new_quantity}")
         
         return jsonify({
             "success": True, 
             "message": "Quantity updated successfully",
-            "new_quantity": new_quantity
+            "new_quantity": new_quantity,
+            "version": new_version
         }), 200
             
     except Exception as e:
@@ -243,75 +282,274 @@ def remove_from_cart(current_user):
 
     try:
         data = request.get_json()
-        logger.debug(f"Received data: {data}")
-        
         cart_item_id = data.get("cart_item_id")
-        logger.debug(f"Extracted cart_item_id: {cart_item_id}")
+        expected_version = parse_int(data.get("version"))
 
         if not cart_item_id:
             logger.error("Missing cart_item_id in request")
             return jsonify({"success": False, "message": "Cart item ID is required"}), 400
 
-        cart_item_check = db.session.execute(
-            "SELECT id FROM cart_details WHERE id = :cart_item_id",
-            {"cart_item_id": cart_item_id}
-        ).fetchone()
-        
-        if not cart_item_check:
-            logger.error(f"Cart item with ID {cart_item_id} not found")
-            return jsonify({"success": False, "message": f"Cart item with ID {cart_item_id} not found"}), 404
-
-        cart_check_query = """
-        SELECT c.user_id 
-        FROM cart_details cd
-        JOIN cart c ON cd.cart_id = c.id
-        WHERE cd.id = :cart_item_id
-        """
-        
-        cart_check = db.session.execute(
-            cart_check_query,
-            {"cart_item_id": cart_item_id},
-        ).fetchone()
-        
-        logger.debug(f"Cart check result: {cart_check}")
-
-        if not cart_check:
-            logger.error(f"Cart item with ID {cart_item_id} not found in any cart")
-            return jsonify({"success": False, "message": "Cart item not found"}), 404
-            
-        if cart_check[0] != current_user.id:
-            logger.warning(
-                f"Unauthorized attempt to remove cart item {cart_item_id} by user {current_user.id}"
-            )
-            return jsonify({"success": False, "message": "Unauthorized access to cart item"}), 403
-
-        try:
-            delete_query = """
-            DELETE FROM cart_details
-            WHERE id = :cart_item_id
-            """
-            
-            result = db.session.execute(
-                delete_query,
-                {"cart_item_id": cart_item_id}
-            )
-            
-            affected_rows = result.rowcount
-            db.session.commit()
-            
-            if affected_rows > 0:
-                logger.info(f"Removed cart item {cart_item_id} for user {current_user.id}")
-                return jsonify({"success": True, "message": "Item removed from cart successfully"}), 200
-            else:
-                logger.warning(f"No rows affected when removing cart item {cart_item_id}")
-                return jsonify({"success": False, "message": "Failed to remove item from cart"}), 400
-                
-        except Exception as sql_error:
+        if not CartDetails.remove_item(cart_item_id, CartDetails.owned_by(current_user.id), expected_version):
             db.session.rollback()
-            logger.error(f"SQL error when removing cart item: {str(sql_error)}")
-            return jsonify({"success": False, "message": f"Database error: {str(sql_error)}"}), 500
+            message, status_code = cart_item_failure(cart_item_id, current_user.id, expected_version=expected_version)
+            logger.warning(f"Cart item {cart_item_id} not removed for user {current_user.id}: {message}")
+            return jsonify({"success": False, "message": message}), status_code
+
+        db.session.commit()
+        cart_summaries.invalidate(current_user.id)
+        logger.info(f"Removed cart item {cart_item_id} for user {current_user.id}")
+        return jsonify({"success": True, "message": "Item removed from cart successfully"}), 200
             
     except Exception as e:
         db.session.rollback()
         logger.error(f"Unexpected error removing from cart: {str(e)}")
         return jsonify({"success": False, "message": f"Unexpected error: {str(e)}"}), 500
+
+def parse_int(value):
+    if isinstance(value, bool):
+        return None
+    try:
+        return int(value)
+    except (TypeError, ValueError):
+        return None
+
+def apply_cart_operation(cart_id, user_id, operation):
+    """Apply one batch operation; returns None on success or (message, status_code)."""
+    op = operation.get("op") if isinstance(operation, dict) else None
+
+    if op == "add":
+        product_id = parse_int(operation.get("product_id"))
+        quantity = parse_int(operation.get("quantity"))
+        if not product_id or quantity is None:
+            return "Product ID and quantity are required", 400
+        status_code, message = CartDetails.add_product(user_id, product_id, quantity)
+        if status_code != 0:
+            return message, 404 if status_code == 1 else 400
+        return None
+
+    if op in ("update", "remove"):
+        cart_item_id = parse_int(operation.get("cart_item_id"))
+        if not cart_item_id:
+            return "Cart item ID is required", 400
+        scope = CartDetails.cart_id == cart_id
+        expected_version = parse_int(operation.get("version"))
+        if op == "remove":
+            if CartDetails.remove_item(cart_item_id, scope, expected_version):
+                return None
+            return cart_item_failure(cart_item_id, user_id, cart_id, expected_version)
+
+        change = parse_int(operation.get("change"))
+        if change is None:
+            return "Change value is required", 400
+        if CartDetails.change_quantity(cart_item_id, change, scope, expected_version):
+            return None
+        return cart_item_failure(cart_item_id, user_id, cart_id, expected_version, change)
+
+    return "Operation must be one of add, update or remove", 400
+
+@cart_bp.route("/cart/batch", methods=["POST"])
+@token_required
+def batch_update_cart(current_user):
+    if not request.is_json:
+        logger.error("Invalid JSON format in request")
+        return jsonify({"success": False, "message": "Invalid JSON format"}), 400
+
+    operations = (request.get_json() or {}).get("operations")
+    if not isinstance(operations, list) or not operations:
+        return jsonify({"success": False, "message": "A non-empty list of operations is required"}), 400
+    if len(operations) > CART_BATCH_MAX_OPERATIONS:
+        return jsonify({
+            "success": False,
+            "message": f"At most {CART_BATCH_MAX_OPERATIONS} operations are allowed per batch"
+        }), 400
+
+    try:
+        # Every update/remove is scoped to this cart id, which is the one
+        # ownership check for the whole batch.
+        if any(isinstance(operation, dict) and operation.get("op") == "add" for operation in operations):
+            cart_id = Cart.get_or_create_active(current_user.id)
+        else:
+            cart_id = db.session.execute(Cart.active_cart_query(current_user.id)).scalar()
+
+        added_products = []
+        for index, operation in enumerate(operations):
+            error = apply_cart_operation(cart_id, current_user.id, operation)
+            if error is not None:
+                db.session.rollback()
+                message, status_code = error
+                logger.warning(f"Cart batch for user {current_user.id} failed at operation {index}: {message}")
+                return jsonify({"success": False, "message": message, "operation_index": index}), status_code
+            if operation["op"] == "add":
+                added_products.append(int(operation["product_id"]))
+
+        db.session.commit()
+        cart_summaries.invalidate(current_user.id)
+        for product_id in added_products:
+            trending.record(product_id, CART_WEIGHT)
+
+        version, catalog_version = cart_summaries.version(current_user.id), catalog_cache.version
+        items, total_price = cart_contents(cart_id) if cart_id else ([], 0)
+        cart_summaries.set(current_user.id, summarize_items(items, total_price), version, catalog_version)
+        logger.info(f"Applied {len(operations)} cart operations for user {current_user.id}")
+        return jsonify({
+            "success": True,
+            "message": "Cart updated successfully",
+            "data": items,
+            "total_price": total_price
+        }), 200
+
+    except SQLAlchemyError as e:
+        db.session.rollback()
+        logger.error(f"SQLAlchemy error in cart batch for user {current_user.id}: {str(e)}")
+        return jsonify({"success": False, "message": "Database error", "error": str(e)}), 500
+    except Exception as e:
+        db.session.rollback()
+        logger.error(f"Unexpected error in cart batch for user {current_user.id}: {str(e)}")
+        return jsonify({"success": False, "message": "Unexpected error", "error": str(e)}), 500
+
+@cart_bp.route("/cart/summary", methods=["GET"])
+@token_required
+def cart_summary(current_user):
+    try:
+        catalog_version = catalog_cache.version
+        summary = cart_summaries.get(current_user.id, catalog_version)
+        if summary is None:
+            version = cart_summaries.version(current_user.id)
+            line_count, item_count, total_price = db.session.execute(
+                CART_SUMMARY_QUERY, {"user_id": current_user.id}
+            ).fetchone()
+            summary = cart_summaries.set(current_user.id, {
+                "line_count": line_count,
+                "item_count": int(item_count),
+                "total_price": round(float(total_price), 2)
+            }, version, catalog_version)
+
+        return jsonify({"success": True, **summary}), 200
+
+    except Exception as e:
+        logger.error(f"Error retrieving cart summary for user {current_user.id}: {str(e)}")
+        return jsonify({
+            "success": False,
+            "message": "An error occurred while retrieving cart summary",
+            "error": str(e)
+        }), 500
+
+GUEST_PRODUCTS_QUERY = text("""
+SELECT id, product_name, price, discount, stock
+FROM products
+WHERE id IN :product_ids AND is_active = :is_active
+""").bindparams(bindparam("product_ids", expanding=True))
+
+def price_guest_items(items):
+    """Price ``{product_id: quantity}`` against the catalog, dropping unavailable products.
+
+    Quantities are capped at stock and at MAX_LINE_QUANTITY, the most a token
+    line may hold, so every returned cart can be signed and loaded again.
+    """
+    if not items:
+        return {}, [], 0
+    rows = db.session.execute(GUEST_PRODUCTS_QUERY, {"product_ids": list(items), "is_active": True}).fetchall()
+    available, lines = {}, []
+    for product_id, product_name, price, discount, stock in rows:
+        quantity = min(items[product_id], stock, MAX_LINE_QUANTITY)
+        if quantity <= 0:
+            continue
+        available[product_id] = quantity
+        unit_price, discount = float(price), float(discount or 0)
+        lines.append({
+            "cart_item_id": None,
+            "product_id": product_id,
+            "product_name": product_name,
+            "quantity": quantity,
+            "unit_price": unit_price,
+            "discount": discount,
+            "item_total": unit_price * (1 - discount / 100.0) * quantity
+        })
+    return available, lines, round(sum(line["item_total"] for line in lines), 2)
+
+def apply_guest_operation(items, operation):
+    """Apply one operation to a guest cart dict; returns None on success or (message, status_code)."""
+    op = operation.get("op") if isinstance(operation, dict) else None
+    product_id = parse_int(operation.get("product_id")) if op else None
+    if not product_id:
+        return "Operation and product ID are required", 400
+
+    if op == "add":
+        quantity = parse_int(operation.get("quantity"))
+        if quantity is None or quantity <= 0:
+            return "Quantity must be a positive integer", 400
+        items[product_id] = items.get(product_id, 0) + quantity
+    elif op == "update":
+        change = parse_int(operation.get("change"))
+        if change is None:
+            return "Change value is required", 400
+        if product_id not in items:
+            return f"Product {product_id} is not in the cart", 404
+        if items[product_id] + change <= 0:
+            return "Quantity must be greater than 0", 400
+        items[product_id] += change
+    elif op == "remove":
+        if items.pop(product_id, None) is None:
+            return f"Product {product_id} is not in the cart", 404
+    else:
+        return "Operation must be one of add, update or remove", 400
+    return None
+
+@cart_bp.route("/guest-cart", methods=["GET", "POST"])
+def guest_cart():
+    """Cart for anonymous visitors, carried in a signed token instead of the cart tables.
+
+    Guest adds do not feed the trending scores: the route is unauthenticated,
+    so anyone could replay it to push a product up the list.
+    """
+    data = (request.get_json(silent=True) if request.method == "POST" else None) or {}
+    token = data.get("cart_token") or request.args.get("cart_token") or request.headers.get("X-Guest-Cart")
+
+    try:
+        items = load_guest_cart(token)
+    except InvalidGuestCart as e:
+        logger.warning(f"Rejected guest cart token: {str(e)}")
+        return jsonify({"success": False, "message": str(e)}), 400
+
+    operations = data.get("operations") or []
+    if not isinstance(operations, list) or len(operations) > CART_BATCH_MAX_OPERATIONS:
+        return jsonify({
+            "success": False,
+            "message": f"Operations must be a list of at most {CART_BATCH_MAX_OPERATIONS} entries"
+        }), 400
+
+    added_products = []
+    for index, operation in enumerate(operations):
+        error = apply_guest_operation(items, operation)
+        if error is not None:
+            message, status_code = error
+            return jsonify({"success": False, "message": message, "operation_index": index}), status_code
+        if operation["op"] == "add":
+            added_products.append(parse_int(operation["product_id"]))
+
+    if len(items) > app.config["GUEST_CART_MAX_ITEMS"]:
+        return jsonify({
+            "success": False,
+            "message": f"A guest cart can hold at most {app.config['GUEST_CART_MAX_ITEMS']} products"
+        }), 400
+
+    try:
+        items, lines, total_price = price_guest_items(items)
+        missing = [product_id for product_id in added_products if product_id not in items]
+        if missing:
+            return jsonify({"success": False, "message": f"Product {missing[0]} not found"}), 404
+
+        return jsonify({
+            "success": True,
+            "cart_token": dump_guest_cart(items),
+            "data": lines,
+            "total_price": total_price
+        }), 200
+
+    except Exception as e:
+        logger.error(f"Error pricing guest cart: {str(e)}")
+        return jsonify({
+            "success": False,
+            "message": "An error occurred while retrieving cart",
+            "error": str(e)
+        }), 500
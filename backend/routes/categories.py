@@ -1,5 +1,5 @@
 from flask import Blueprint, jsonify, request
-from backend.extensions import db
+from backend.extensions import db, catalog_cache
 from backend.models.Category import Category
 from backend.routes.auth import token_required
 from sqlalchemy.sql import text
@@ -122,6 +122,7 @@ def create_category(current_user):
         new_category = Category(category_name=category_name)
         db.session.add(new_category)
         db.session.commit()
+        catalog_cache.bump()
         
         return jsonify({
             'message': 'Category created successfully',
@@ -1,7 +1,13 @@
 from flask import Blueprint, request, jsonify
+from sqlalchemy import func, select, text, update
 from sqlalchemy.exc import SQLAlchemyError
 from backend.routes.auth import token_required
-from backend.extensions import db
+from backend.utils.idempotency import idempotent
+from backend.extensions import db, trending, cart_summaries, catalog_cache
+from backend.models import Cart, Order, Payment, Product
+from datetime import datetime
+from decimal import Decimal, ROUND_HALF_UP
+from backend.utils.trending import ORDER_WEIGHT
 import logging
 
 logging.basicConfig(level=logging.DEBUG)
@@ -12,8 +18,108 @@ checkout_bp = Blueprint('checkout', __name__)
 def check_admin(current_user):
     return current_user.user_role.lower() == 'admin'
     
+class CheckoutError(Exception):
+    def __init__(self, message, status_code=400):
+        super().__init__(message)
+        self.message = message
+        self.status_code = status_code
+
+CART_LINES_QUERY = text("""
+SELECT cd.product_id, cd.quantity, cd.price, cd.discount, p.product_name
+FROM cart_details cd
+JOIN products p ON cd.product_id = p.id
+WHERE cd.cart_id = :cart_id
+""")
+
+# One statement for every line: rows are only touched when the product is
+# active and has enough stock, so rowcount < line count means a shortfall.
+DECREMENT_STOCK = text("""
+UPDATE products
+SET stock = stock - (
+    SELECT cd.quantity FROM cart_details cd
+    WHERE cd.cart_id = :cart_id AND cd.product_id = products.id
+)
+WHERE id IN (SELECT cd.product_id FROM cart_details cd WHERE cd.cart_id = :cart_id)
+  AND is_active = :is_active
+  AND stock >= (
+    SELECT cd.quantity FROM cart_details cd
+    WHERE cd.cart_id = :cart_id AND cd.product_id = products.id
+)
+""")
+
+COPY_CART_LINES = text("""
+INSERT INTO order_details (order_id, product_id, quantity, price, discount)
+SELECT :order_id, cd.product_id, cd.quantity, cd.price, cd.discount
+FROM cart_details cd
+WHERE cd.cart_id = :cart_id
+""")
+
+SHORT_LINES_QUERY = text("""
+SELECT p.product_name
+FROM cart_details cd
+JOIN products p ON cd.product_id = p.id
+WHERE cd.cart_id = :cart_id AND (p.stock < cd.quantity OR p.is_active = :is_inactive)
+""")
+
+def line_total(quantity, price, discount):
+    return quantity * Decimal(str(price)) * (1 - Decimal(str(discount or 0)) / 100)
+
+def stock_ran_out(product_ids):
+    """Whether any of the products just sold out, which changes what the catalog shows."""
+    try:
+        return bool(db.session.execute(
+            select(func.count()).select_from(Product).where(Product.id.in_(product_ids), Product.stock <= 0)
+        ).scalar())
+    except SQLAlchemyError as e:
+        db.session.rollback()
+        logger.warning(f"Could not check stock after checkout: {str(e)}")
+        return True
+
+def create_order_from_cart(user_id, shipping_address, payment_method):
+    """Turn the user's open cart into an order in the caller's transaction.
+
+    Closes the cart with a compare-and-swap, decrements stock for every line
+    in one conditional UPDATE, copies the lines with INSERT ... SELECT and adds
+    the pending payment. Raises CheckoutError; the caller commits or rolls back.
+    Returns ``(order_id, lines)``.
+    """
+    if payment_method not in Payment.PAYMENT_METHODS:
+        raise CheckoutError(f"Payment method must be one of: {', '.join(Payment.PAYMENT_METHODS)}")
+
+    cart_id = db.session.execute(Cart.active_cart_query(user_id)).scalar()
+    if cart_id is None:
+        raise CheckoutError("No active cart found")
+
+    lines = db.session.execute(CART_LINES_QUERY, {"cart_id": cart_id}).fetchall()
+    total_amount = sum((line_total(line.quantity, line.price, line.discount) for line in lines), Decimal(0))
+    total_amount = total_amount.quantize(Decimal("0.01"), rounding=ROUND_HALF_UP)
+    if total_amount <= 0:
+        raise CheckoutError("Your cart is empty or the total amount is zero")
+
+    closed = db.session.execute(
+        update(Cart.__table__).where(Cart.id == cart_id, Cart.is_checked_out == False).values(is_checked_out=True)
+    )
+    if closed.rowcount != 1:
+        raise CheckoutError("This cart is already being checked out", 409)
+
+    decremented = db.session.execute(DECREMENT_STOCK, {"cart_id": cart_id, "is_active": True})
+    if decremented.rowcount != len(lines):
+        short = db.session.execute(SHORT_LINES_QUERY, {"cart_id": cart_id, "is_inactive": False}).scalars().all()
+        raise CheckoutError(f"Insufficient stock for: {', '.join(short)}")
+
+    order = Order(user_id=user_id, total_amount=total_amount, shipping_address=shipping_address, status='Pending')
+    db.session.add(order)
+    db.session.flush()
+
+    db.session.execute(COPY_CART_LINES, {"order_id": order.id, "cart_id": cart_id})
+    db.session.add(Payment(order_id=order.id, amount=total_amount, payment_method=payment_method,
+                           status='Pending', payment_date=datetime.utcnow()))
+    db.session.flush()
+    return order.id, lines
+
 @checkout_bp.route('/checkout', methods=['POST'])
 @token_required
+@idempotent
 def create_order(current_user):
     if not request.is_json:
         logger.error("Invalid JSON format in request")
@@ -31,72 +137,15 @@ def create_order(current_user):
         }), 400
 
     try:
-
-        cart = db.session.execute(
-            "SELECT id FROM Cart WHERE user_id = :user_id AND is_checked_out = 0",
-            {"user_id": current_user.id}
-        ).fetchone()
-
-        if not cart:
-            logger.warning(f"No active cart found for user {current_user.id}")
-            return jsonify({
-                'success': False,
-                'message': 'No active cart found'
-            }), 400
-
-        cart_id = cart[0]
-        
-        total_amount = db.session.execute(
-            "SELECT SUM(quantity * price * (1 - discount / 100)) FROM cart_details WHERE cart_id = :cart_id",
-            {"cart_id": cart_id}
-        ).scalar()
-
-        total_amount = float(total_amount) if total_amount is not None else 0.00
-        print(f"Total amount: {total_amount}")
-
-        if total_amount <= 0:
-            logger.warning(f"Cart is empty or total amount is zero for user {current_user.id}")
-            return jsonify({
-                'success': False,
-                'message': 'Your cart is empty or the total amount is zero'
-            }), 400
-
-        result = db.session.execute(
-            "EXEC CreateOrder @UserID=:user_id, @ShippingAddress=:shipping_address, @TotalAmount=:total_amount, @PaymentMethod=:payment_method",
-            {
-                "user_id": current_user.id,
-                "shipping_address": shipping_address,
-                "total_amount": total_amount,
-                "payment_method": payment_method
-            }
-        )
-        rows = result.fetchall()
+        order_id, lines = create_order_from_cart(current_user.id, shipping_address, payment_method)
         db.session.commit()
-    
-        if rows:
-            row = rows[0]
-            status, status_code, message, order_id = row
-            print(f"CreateOrder result: {status}, {status_code}, {message}, {order_id}")
-            if status == 'success':
-                logger.info(f"Order {order_id} created successfully for user {current_user.id}")
-                return jsonify({
-                    'success': True,
-                    'message': message,
-                    'order_id': order_id
-                }), 200
-            else:
-                logger.warning(f"Failed to create order for user {current_user.id}: {message}")
-                return jsonify({
-                    'success': False,
-                    'message': message
-                }), 400 if status_code in (1, 3, 4) else 500
-        else:
-            logger.error(f"No result returned from CreateOrder for user {current_user.id}")
-            return jsonify({
-                'success': False,
-                'message': 'No result returned from order creation'
-            }), 500
-
+    except CheckoutError as e:
+        db.session.rollback()
+        logger.warning(f"Failed to create order for user {current_user.id}: {e.message}")
+        return jsonify({
+            'success': False,
+            'message': e.message
+        }), e.status_code
     except SQLAlchemyError as e:
         db.session.rollback()
         logger.error(f"SQLAlchemy error during checkout for user {current_user.id}: {str(e)}")
@@ -113,6 +162,19 @@ def create_order(current_user):
             'message': 'Unexpected error',
             'error': str(e)
         }), 500
+
+    cart_summaries.invalidate(current_user.id)
+    if stock_ran_out([line.product_id for line in lines]):
+        catalog_cache.bump()
+    for line in lines:
+        trending.record(line.product_id, ORDER_WEIGHT * line.quantity)
+
+    logger.info(f"Order {order_id} created successfully for user {current_user.id}")
+    return jsonify({
+        'success': True,
+        'message': 'Order created successfully',
+        'order_id': order_id
+    }), 200
     
 @checkout_bp.route('/order/<int:order_id>', methods=['GET'])
 @token_required
@@ -4,14 +4,36 @@ from backend.models import Payment, Order
 from datetime import datetime
 import stripe
 from backend.routes.auth import token_required
+from backend.utils.concurrency import ConcurrentUpdateError, run_with_retry
+from backend.utils.idempotency import IDEMPOTENCY_HEADER, idempotent
+from sqlalchemy import update
+from sqlalchemy.exc import IntegrityError
+from sqlalchemy.orm.exc import StaleDataError
 import logging
 
 logger = logging.getLogger(__name__)
 
 payment_bp = Blueprint('payment', __name__)
 
+# Failures a retry can fix. They map to 5xx so @idempotent releases the key
+# instead of replaying the failure for the rest of its lifetime.
+TRANSIENT_STRIPE_ERRORS = (stripe.error.APIConnectionError, stripe.error.RateLimitError, stripe.error.APIError)
+
+def stripe_error_response(error):
+    if isinstance(error, stripe.error.RateLimitError):
+        status_code = 503
+    elif isinstance(error, TRANSIENT_STRIPE_ERRORS):
+        status_code = 502
+    else:
+        status_code = 400
+    return jsonify({
+        "success": False,
+        "message": f"Payment processing error: {str(error)}"
+    }), status_code
+
 @payment_bp.route('/create-checkout-session', methods=['POST'])
 @token_required
+@idempotent
 def create_checkout_session(current_user):
     try:
         logger.info(f"Creating checkout session for user {current_user.id}")
@@ -95,8 +117,15 @@ def create_checkout_session(current_user):
         frontend_url = current_app.config.get('FRONTEND_URL', 'http://localhost:3000')
         logger.info(f"Frontend URL: {frontend_url}")
         
+        # A retried request reuses the client's key with Stripe too, so a
+        # session created before a timeout is returned rather than duplicated.
+        stripe_options = {}
+        if request.headers.get(IDEMPOTENCY_HEADER):
+            stripe_options['idempotency_key'] = f"checkout-session-{current_user.id}-{request.headers[IDEMPOTENCY_HEADER]}"
+
         try:
             checkout_session = stripe.checkout.Session.create(
+                **stripe_options,
                 payment_method_types=['card'],
                 line_items=line_items,
                 mode='payment',
@@ -119,17 +148,11 @@ def create_checkout_session(current_user):
             
         except stripe.error.StripeError as se:
             logger.error(f"Stripe error creating checkout session: {str(se)}")
-            return jsonify({
-                "success": False,
-                "message": f"Payment processing error: {str(se)}"
-            }), 400
+            return stripe_error_response(se)
             
     except stripe.error.StripeError as e:
         logger.error(f"Stripe error: {str(e)}")
-        return jsonify({
-            "success": False,
-            "message": f"Payment processing error: {str(e)}"
-        }), 400
+        return stripe_error_response(e)
     except Exception as e:
         logger.error(f"Error creating checkout session: {str(e)}")
         return jsonify({
@@ -139,27 +162,63 @@ def create_checkout_session(current_user):
         }), 500
 
 @payment_bp.route('/payment/create/<int:order_id>', methods=['POST'])
-def create_payment(order_id):
-    order = Order.query.get_or_404(order_id)
-    if order.status != 'Pending':
-        return jsonify({'message': 'Order is not pending'}), 400
-
-    data = request.get_json()
+@token_required
+@idempotent
+def create_payment(current_user, order_id):
+    data = request.get_json(silent=True) or {}
     payment_method = data.get('payment_method', 'Cash on Delivery')
+    if payment_method not in Payment.PAYMENT_METHODS:
+        return jsonify({'message': f"Payment method must be one of: {', '.join(Payment.PAYMENT_METHODS)}"}), 400
 
-    new_payment = Payment(
-        order_id=order_id,
-        amount=order.total_amount,
-        payment_method=payment_method,
-        payment_status='Pending',
-        payment_date=datetime.utcnow()
-    )
-    db.session.add(new_payment)
+    def place_payment():
+        order = Order.query.get(order_id)
+        if not order or order.user_id != current_user.id:
+            return jsonify({'message': 'Order not found'}), 404
+        if order.status != 'Pending':
+            return jsonify({'message': 'Order is not pending'}), 400
 
-    order.status = 'Processing'
-    db.session.commit()
+        # /checkout creates the order's payment row; this route only settles
+        # the method on it, or adds the row for orders placed before that.
+        payment = Payment.query.filter_by(order_id=order_id).first()
+        if payment is not None and payment.status != 'Pending':
+            return jsonify({'message': 'Order is already paid'}), 400
 
-    return jsonify({'message': 'Payment created successfully', 'payment_id': new_payment.id}), 201
+        # Compare-and-swap on orders.version so two concurrent requests cannot
+        # both add a payment for the same order.
+        claimed = db.session.execute(
+            update(Order.__table__).where(
+                Order.id == order_id, Order.version == order.version, Order.status == 'Pending'
+            ).values(version=Order.version + 1)
+        )
+        if claimed.rowcount != 1:
+            raise ConcurrentUpdateError(f"Order {order_id} changed while creating its payment")
+
+        if payment is None:
+            payment = Payment(
+                order_id=order_id,
+                amount=order.total_amount,
+                payment_method=payment_method,
+                status='Pending',
+                payment_date=datetime.utcnow()
+            )
+            db.session.add(payment)
+            status_code, message = 201, 'Payment created successfully'
+        else:
+            payment.payment_method = payment_method
+            status_code, message = 200, 'Payment updated successfully'
+        db.session.commit()
+
+        return jsonify({'message': message, 'payment_id': payment.id}), status_code
+
+    try:
+        return run_with_retry(place_payment)
+    except (StaleDataError, ConcurrentUpdateError):
+        logger.warning(f"Order {order_id} kept changing while creating a payment")
+        return jsonify({'message': 'Order was modified by another request, please retry'}), 409
+    except IntegrityError as e:
+        db.session.rollback()
+        logger.warning(f"Payment for order {order_id} rejected by a constraint: {str(e)}")
+        return jsonify({'message': 'Payment could not be recorded for this order'}), 400
 
 @payment_bp.route('/payment/<int:payment_id>', methods=['GET'])
 def get_payment(payment_id):
@@ -169,6 +228,6 @@ def get_payment(payment_id):
         'order_id': payment.order_id,
         'amount': float(payment.amount),
         'payment_method': payment.payment_method,
-        'payment_status': payment.payment_status,
+        'payment_status': payment.status,
         'payment_date': payment.payment_date.isoformat()
     }) 
@@ -1,59 +1,151 @@
-from flask import Blueprint, jsonify, request
-from backend.extensions import db
+from flask import Blueprint, jsonify, request, json
+from backend.extensions import db, catalog_cache, search_cache, product_details_cache, search_index
+from backend.utils.http import conditional_json_response
+from backend.utils.serializers import RowMapper
 import logging
-from sqlalchemy.exc import SQLAlchemyError
+from sqlalchemy.exc import IntegrityError, SQLAlchemyError
 from backend.routes.auth import token_required
 from sqlalchemy import text
 from decimal import Decimal
-from backend.models import ProductReview
+import base64
+from backend.models import ProductReview, ProductRatingStats, Product, Category
 
 logging.basicConfig(level=logging.DEBUG)
 logger = logging.getLogger(__name__)
 product_bp = Blueprint('product', __name__)
 
+DEFAULT_PAGE_SIZE = 20
+MAX_PAGE_SIZE = 100
+MAX_REVIEWS_PAGE_SIZE = 50
+
+def encode_cursor(last_id):
+    return base64.urlsafe_b64encode(str(last_id).encode()).decode().rstrip('=')
+
+def decode_cursor(cursor):
+    padded = cursor + '=' * (-len(cursor) % 4)
+    return int(base64.urlsafe_b64decode(padded.encode()).decode())
+
+PRODUCT_ROW = RowMapper(
+    "id", "product_name", "product_description", "price", "stock",
+    "category_id", "category_name", "image_url", "discount",
+    ("total_reviews", lambda review_count: review_count or 0), "rating_sum"
+)
+
+CATEGORY_ROW = RowMapper("id", "category_name")
+
+def format_product_row(row):
+    product = PRODUCT_ROW(row)
+    product["average_rating"] = ProductRatingStats.summarize(product["total_reviews"], product.pop("rating_sum"))[0]
+    return product
+
+def get_products_page(category_id, after_id, limit):
+    query = db.session.query(
+        Product.id, Product.product_name, Product.product_description, Product.price, Product.stock,
+        Category.id, Category.category_name, Product.image_url, Product.discount,
+        ProductRatingStats.review_count, ProductRatingStats.rating_sum
+    ).outerjoin(
+        Category, Product.category_id == Category.id
+    ).outerjoin(
+        ProductRatingStats, ProductRatingStats.product_id == Product.id
+    ).filter(
+        Product.is_active == True
+    )
+    if category_id:
+        query = query.filter(Product.category_id == category_id)
+    if after_id is not None:
+        query = query.filter(Product.id > after_id)
+
+    rows = query.order_by(Product.id).limit(limit + 1).all()
+    next_cursor = encode_cursor(rows[limit - 1][0]) if len(rows) > limit else None
+    return [format_product_row(row) for row in rows[:limit]], next_cursor
+
+def build_search_index():
+    rows = db.session.query(
+        Product.id, Product.product_name, Product.product_description, Category.category_name
+    ).outerjoin(
+        Category, Product.category_id == Category.id
+    ).filter(
+        Product.is_active == True
+    ).all()
+    search_index.build(rows)
+    logger.info(f"Built product search index with {len(search_index)} products")
+
+def index_product(product_id):
+    row = db.session.query(
+        Product.id, Product.product_name, Product.product_description, Category.category_name, Product.is_active
+    ).outerjoin(
+        Category, Product.category_id == Category.id
+    ).filter(
+        Product.id == product_id
+    ).first()
+    if row is None:
+        search_index.remove(product_id)
+    else:
+        search_index.upsert(*row)
+
 @product_bp.route('/products', methods=['GET'])
 def get_products():
     try:
 
         category_id = request.args.get('category_id', default=None, type=int)
+        cursor = request.args.get('cursor')
+        limit = request.args.get('limit', default=None, type=int)
+        paginated = cursor is not None or 'limit' in request.args
+
+        if paginated:
+            if limit is None:
+                limit = DEFAULT_PAGE_SIZE
+            if limit < 1:
+                return jsonify({'message': 'limit must be a positive integer'}), 400
+            limit = min(limit, MAX_PAGE_SIZE)
+            try:
+                after_id = decode_cursor(cursor) if cursor else None
+            except (ValueError, UnicodeDecodeError):
+                logger.warning(f"Invalid products cursor: {cursor}")
+                return jsonify({'message': 'Invalid cursor'}), 400
+
+        cache_key = ('products', category_id or None, cursor, limit) if paginated else ('products', category_id or None)
+        cached = catalog_cache.get(cache_key)
+        if cached is not None:
+            return conditional_json_response(*cached)
+
+        version = catalog_cache.version
+        if paginated:
+            formatted_products, next_cursor = get_products_page(category_id, after_id, limit)
+            logger.info(f"Retrieved page of {len(formatted_products)} products for category_id {category_id if category_id else 'all'}")
+            body = json.dumps({'products': formatted_products, 'next_cursor': next_cursor, 'limit': limit})
+            return conditional_json_response(*catalog_cache.set(cache_key, body, version))
 
         if category_id:
             query = text("""
                 SELECT p.id, p.product_name, p.product_description, p.price, p.stock, 
-                       c.id as category_id, c.category_name, p.image_url, p.discount
+                       c.id as category_id, c.category_name, p.image_url, p.discount,
+                       s.review_count, s.rating_sum
                 FROM products p
                 LEFT JOIN categories c ON p.category_id = c.id
+                LEFT JOIN product_rating_stats s ON s.product_id = p.id
                 WHERE p.category_id = :category_id AND p.is_active = 1
             """)
             result = db.session.execute(query, {'category_id': category_id})
         else:
             query = text("""
                 SELECT p.id, p.product_name, p.product_description, p.price, p.stock, 
-                       c.id as category_id, c.category_name, p.image_url, p.discount
+                       c.id as category_id, c.category_name, p.image_url, p.discount,
+                       s.review_count, s.rating_sum
                 FROM products p
                 LEFT JOIN categories c ON p.category_id = c.id
+                LEFT JOIN product_rating_stats s ON s.product_id = p.id
                 WHERE p.is_active = 1
             """)
             result = db.session.execute(query)
         
         products = result.fetchall()
 
-        formatted_products = []
-        for row in products:
-            formatted_products.append({
-                "id": row[0],
-                "product_name": row[1],
-                "product_description": row[2],
-                "price": float(row[3]) if isinstance(row[3], Decimal) else row[3],
-                "stock": row[4],
-                "category_id": row[5],
-                "category_name": row[6],
-                "image_url": row[7],
-                "discount": float(row[8]) if isinstance(row[8], Decimal) else row[8]
-            })
+        formatted_products = [format_product_row(row) for row in products]
         
         logger.info(f"Retrieved {len(formatted_products)} products for category_id {category_id if category_id else 'all'}")
-        return jsonify({'products': formatted_products}), 200
+        body = json.dumps({'products': formatted_products})
+        return conditional_json_response(*catalog_cache.set(cache_key, body, version))
 
     except SQLAlchemyError as e:
         logger.error(f"SQLAlchemy error fetching products: {str(e)}")
@@ -62,6 +154,61 @@ def get_products():
         logger.error(f"General error fetching products: {str(e)}")
         return jsonify({'message': 'Error flowing products', 'error': str(e)}), 500
 
+@product_bp.route('/products/search', methods=['GET'])
+def search_products():
+    try:
+        query_text = request.args.get('q', default='', type=str).strip()
+        limit = request.args.get('limit', default=DEFAULT_PAGE_SIZE, type=int)
+
+        if not query_text:
+            return jsonify({'message': 'Search query is required'}), 400
+        if limit < 1:
+            return jsonify({'message': 'limit must be a positive integer'}), 400
+        limit = min(limit, MAX_PAGE_SIZE)
+
+        # Search terms are open-ended, so they get their own small LRU rather
+        # than evicting category and product pages from catalog_cache.
+        cache_key = (' '.join(query_text.lower().split()), limit)
+        cached = search_cache.get(cache_key)
+        if cached is not None:
+            return conditional_json_response(*cached)
+
+        version = search_cache.version
+        if not search_index.ready:
+            build_search_index()
+
+        ranked = search_index.search(query_text, limit)
+        formatted_products = []
+        if ranked:
+            rows = db.session.query(
+                Product.id, Product.product_name, Product.product_description, Product.price, Product.stock,
+                Category.id, Category.category_name, Product.image_url, Product.discount,
+                ProductRatingStats.review_count, ProductRatingStats.rating_sum
+            ).outerjoin(
+                Category, Product.category_id == Category.id
+            ).outerjoin(
+                ProductRatingStats, ProductRatingStats.product_id == Product.id
+            ).filter(
+                Product.id.in_([product_id for product_id, _ in ranked])
+            ).all()
+            rows_by_id = {row[0]: row for row in rows}
+            for product_id, score in ranked:
+                if product_id in rows_by_id:
+                    product = format_product_row(rows_by_id[product_id])
+                    product['score'] = round(score, 4)
+                    formatted_products.append(product)
+
+        logger.info(f"Search '{query_text}' matched {len(formatted_products)} products")
+        body = json.dumps({'query': query_text, 'products': formatted_products})
+        return conditional_json_response(*search_cache.set(cache_key, body, version))
+
+    except SQLAlchemyError as e:
+        logger.error(f"SQLAlchemy error searching products: {str(e)}")
+        return jsonify({'message': 'Error searching products', 'error': str(e)}), 500
+    except Exception as e:
+        logger.error(f"General error searching products: {str(e)}")
+        return jsonify({'message': 'Error searching products', 'error': str(e)}), 500
+
 @product_bp.route('/product/<string:product_name>', methods=['GET'])
 @token_required
 def get_product_details(current_user, product_name):
@@ -77,15 +224,35 @@ def get_product_details(current_user, product_name):
                 'message': 'Invalid pagination parameters',
                 'status_code': 4
             }), 400
+        per_page = min(per_page, MAX_REVIEWS_PAGE_SIZE)
+
+        # Review pages are keyed by client-chosen paging, so they get their own
+        # LRU rather than evicting category and product pages from catalog_cache.
+        cache_key = (product_name, page, per_page)
+        cached = product_details_cache.get(cache_key)
+        if cached is not None:
+            details = cached[0]
+            existing_review = db.session.execute(
+                text("SELECT 1 FROM product_reviews WHERE product_id = :product_id AND user_id = :user_id"),
+                {'product_id': details['product']['product_id'], 'user_id': current_user.id}
+            ).fetchone()
+            return jsonify(dict(details, can_review=not existing_review)), 200
 
+        version = product_details_cache.version
         logger.debug(f"Fetching product details for: {product_name}")
         product_result = db.session.execute(text("""
             SELECT p.id as product_id, p.product_name, p.product_description, p.price, 
-                   p.stock, c.category_name, p.image_url, p.discount
+                   p.stock, c.category_name, p.image_url, p.discount,
+                   s.review_count, s.rating_sum, s.rating_1, s.rating_2, s.rating_3, s.rating_4, s.rating_5,
+                   CASE WHEN EXISTS (
+                       SELECT 1 FROM product_reviews r
+                       WHERE r.product_id = p.id AND r.user_id = :user_id
+                   ) THEN 1 ELSE 0 END AS has_reviewed
             FROM products p
             LEFT JOIN categories c ON p.category_id = c.id
+            LEFT JOIN product_rating_stats s ON s.product_id = p.id
             WHERE p.product_name = :product_name
-        """), {'product_name': product_name})
+        """), {'product_name': product_name, 'user_id': current_user.id})
         product_row = product_result.fetchone()
 
         if not product_row:
@@ -112,56 +279,47 @@ def get_product_details(current_user, product_name):
             'image_url': product_row[6],
             'discount': float(discount) if isinstance(discount, Decimal) else discount
         }
+        product_details['average_rating'], product_details['total_reviews'] = ProductRatingStats.summarize(
+            product_row[8], product_row[9]
+        )
+        product_details['rating_histogram'] = {
+            str(stars): product_row[9 + stars] or 0 for stars in range(1, 6)
+        }
 
-        logger.debug(f"Fetching reviews for product: {product_name}, page: {page}, per_page: {per_page}")
-        offset = (page - 1) * per_page
-        reviews_result = db.session.execute(text("""
-            SELECT pr.id as review_id, p.id as product_id, p.product_name, u.id as user_id, 
-                   u.username, pr.rating, pr.review_text, pr.created_at, pr.image_url
-            FROM product_reviews pr
-            JOIN products p ON pr.product_id = p.id
-            JOIN users u ON pr.user_id = u.id
-            WHERE p.product_name = :product_name
-            ORDER BY pr.created_at DESC
-            LIMIT :per_page OFFSET :offset
-        """), {'product_name': product_name, 'per_page': per_page, 'offset': offset})
+        can_review = not product_row[15]
+        total_reviews = product_details['total_reviews']
 
         reviews = []
-        for row in reviews_result:
-            reviews.append({
-                'review_id': row[0],
-                'product_id': row[1],
-                'product_name': row[2],
-                'user_id': row[3],
-                'username': row[4],
-                'rating': float(row[5]) if isinstance(row[5], Decimal) else row[5],
-                'review_text': row[6],
-                'review_date': str(row[7]) if row[7] else '',
-                'photo_url': row[8]
-            })
-
-        avg_rating_result = db.session.execute(text("""
-            SELECT 
-                AVG(CAST(rating AS FLOAT)) AS average_rating,
-                COUNT(rating) AS total_reviews
-            FROM product_reviews
-            WHERE product_id = :product_id
-        """), {'product_id': product_id}).fetchone()
-
-        product_details['average_rating'] = round(float(avg_rating_result[0]), 1) if avg_rating_result[0] else 0
-        product_details['total_reviews'] = avg_rating_result[1] if avg_rating_result[1] else 0
-
-        existing_review = db.session.execute(
-            text("SELECT 1 FROM product_reviews WHERE product_id = :product_id AND user_id = :user_id"),
-            {'product_id': product_id, 'user_id': current_user.id}
-        ).fetchone()
-        can_review = not existing_review
+        offset = (page - 1) * per_page
+        if offset < total_reviews:
+            logger.debug(f"Fetching reviews for product: {product_name}, page: {page}, per_page: {per_page}")
+            reviews_result = db.session.execute(text("""
+                SELECT pr.id as review_id, u.id as user_id, u.username, pr.rating,
+                       pr.review_text, pr.created_at, pr.image_url
+                FROM product_reviews pr
+                JOIN users u ON pr.user_id = u.id
+                WHERE pr.product_id = :product_id
+                ORDER BY pr.created_at DESC
+                LIMIT :per_page OFFSET :offset
+            """), {'product_id': product_id, 'per_page': per_page, 'offset': offset})
+
+            for row in reviews_result:
+                reviews.append({
+                    'review_id': row[0],
+                    'product_id': product_id,
+                    'product_name': product_details['product_name'],
+                    'user_id': row[1],
+                    'username': row[2],
+                    'rating': float(row[3]) if isinstance(row[3], Decimal) else row[3],
+                    'review_text': row[4],
+                    'review_date': str(row[5]) if row[5] else '',
+                    'photo_url': row[6]
+                })
 
-        total_reviews = product_details['total_reviews']
         total_pages = (total_reviews + per_page - 1) // per_page if total_reviews > 0 else 1
 
         logger.info(f"Retrieved product details and {len(reviews)} reviews for product: {product_name}, page: {page}")
-        return jsonify({
+        details = {
             'status': 'success',
             'message': 'Product details and reviews retrieved successfully.',
             'status_code': 0,
@@ -172,9 +330,10 @@ def get_product_details(current_user, product_name):
                 'per_page': per_page,
                 'total_reviews': total_reviews,
                 'total_pages': total_pages
-            },
-            'can_review': can_review
-        }), 200
+            }
+        }
+        product_details_cache.set(cache_key, details, version)
+        return jsonify(dict(details, can_review=can_review)), 200
 
     except SQLAlchemyError as e:
         logger.error(f"SQLAlchemy error fetching product details for {product_name}: {str(e)}")
@@ -195,15 +354,32 @@ def add_product_review(current_user, product_name):
             username = current_user.username
 
             product = db.session.execute(
-                text("SELECT id FROM products WHERE product_name = :product_name"),
-                {'product_name': product_name}
+                text("""
+                    SELECT p.id,
+                           CASE WHEN EXISTS (
+                               SELECT 1 FROM product_reviews r
+                               WHERE r.product_id = p.id AND r.user_id = :user_id
+                           ) THEN 1 ELSE 0 END AS has_reviewed
+                    FROM products p
+                    WHERE p.product_name = :product_name
+                """),
+                {'product_name': product_name, 'user_id': current_user.id}
             ).fetchone()
             
             if not product:
                 return jsonify({'status': 'fail', 'message': 'Product not found'}), 404
+            if product[1]:
+                return jsonify({'status': 'fail', 'message': 'You have already reviewed this product'}), 409
             
             product_id = product[0]
 
+            try:
+                rating = int(rating)
+            except (TypeError, ValueError):
+                rating = None
+            if rating is None or rating < 1 or rating > 5:
+                return jsonify({'status': 'fail', 'message': 'Rating must be an integer between 1 and 5'}), 400
+
             from datetime import datetime
             new_review = ProductReview(
                 product_id=product_id,
@@ -214,7 +390,9 @@ def add_product_review(current_user, product_name):
             )
             
             db.session.add(new_review)
+            ProductRatingStats.apply_review(product_id, rating, 1)
             db.session.commit()
+            catalog_cache.bump()
             
             logger.info(f"Review added by user {current_user.id} for product {product_name}")
             return jsonify({
@@ -231,6 +409,10 @@ def add_product_review(current_user, product_name):
                 }
             }), 201
 
+        except IntegrityError:
+            # A concurrent review by the same user won uq_product_reviews_product_user.
+            db.session.rollback()
+            return jsonify({'status': 'fail', 'message': 'You have already reviewed this product'}), 409
         except SQLAlchemyError as e:
             db.session.rollback()
             logger.error(f"SQLAlchemy error adding review for product {product_name}: {str(e)}")
@@ -265,7 +447,10 @@ def delete_review(current_user, product_name):
             return jsonify({'message': 'No review found to delete'}), 404
         
         db.session.delete(review)
+        if review.rating is not None:
+            ProductRatingStats.apply_review(product_id, review.rating, -1)
         db.session.commit()
+        catalog_cache.bump()
         logger.info(f"Review deleted for product {product_name} by user {current_user.username}")
         return jsonify({'message': 'Review deleted successfully'}), 200
 
@@ -282,20 +467,18 @@ def delete_review(current_user, product_name):
 def get_categories():
     """Get all categories"""
     try:
+        cached = catalog_cache.get(('categories',))
+        if cached is not None:
+            return conditional_json_response(*cached)
+
         logger.info("Fetching all categories")
-        
+        version = catalog_cache.version
         result = db.session.execute(text("SELECT id, category_name FROM categories"))
-        categories = result.fetchall()
-        
-        formatted_categories = []
-        for row in categories:
-            formatted_categories.append({
-                "id": row[0],
-                "category_name": row[1]
-            })
+        formatted_categories = CATEGORY_ROW.many(result.fetchall())
         
         logger.info(f"Retrieved {len(formatted_categories)} categories")
-        return jsonify({'categories': formatted_categories}), 200
+        body = json.dumps({'categories': formatted_categories})
+        return conditional_json_response(*catalog_cache.set(('categories',), body, version))
         
     except Exception as e:
         logger.error(f"Error fetching categories: {str(e)}")
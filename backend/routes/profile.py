@@ -1,5 +1,5 @@
 from flask import Blueprint, jsonify, request
-from backend.extensions import db
+from backend.extensions import db, identity_cache
 from backend.models.User import User
 from backend.routes.auth import token_required
 import logging
@@ -14,14 +14,15 @@ profile_bp = Blueprint("profile", __name__)
 @token_required
 def get_profile(current_user):
     try:
+        user = User.query.get(current_user.id)
         user_data = {
-            'id': current_user.id,
-            'username': current_user.username,
-            'email': current_user.email,
-            'full_name': current_user.full_name,
-            'user_address': current_user.user_address,
-            'phone_number': current_user.phone_number,
-            'user_role': current_user.user_role
+            'id': user.id,
+            'username': user.username,
+            'email': user.email,
+            'full_name': user.full_name,
+            'user_address': user.user_address,
+            'phone_number': user.phone_number,
+            'user_role': user.user_role
         }
         
         return jsonify({
@@ -42,26 +43,28 @@ def get_profile(current_user):
 def update_profile(current_user):
     try:
         data = request.get_json()
+        user = User.query.get(current_user.id)
         
         if 'full_name' in data:
-            current_user.full_name = data['full_name']
+            user.full_name = data['full_name']
         if 'user_address' in data:
-            current_user.user_address = data['user_address']
+            user.user_address = data['user_address']
         if 'phone_number' in data:
-            current_user.phone_number = data['phone_number']
+            user.phone_number = data['phone_number']
         if 'email' in data:
-            current_user.email = data['email']
+            user.email = data['email']
             
         if 'current_password' in data and 'new_password' in data:
-            if not check_password_hash(current_user.pass_word, data['current_password']):
+            if not check_password_hash(user.pass_word, data['current_password']):
                 return jsonify({
                     'success': False,
                     'message': 'Current password is incorrect'
                 }), 400
                 
-            current_user.pass_word = generate_password_hash(data['new_password'])
+            user.pass_word = generate_password_hash(data['new_password'])
             
         db.session.commit()
+        identity_cache.invalidate(current_user.id)
         
         return jsonify({
             'success': True,
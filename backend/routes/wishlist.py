@@ -1,9 +1,11 @@
 from flask import Blueprint, jsonify, request
-from backend.extensions import db
+from backend.extensions import db, trending
 from backend.models.User import User
 from backend.models.Product import Product
 from backend.models.Wishlist import Wishlist
 from backend.routes.auth import token_required
+from backend.utils.trending import WISHLIST_WEIGHT
+from sqlalchemy.exc import IntegrityError
 import logging
 
 logging.basicConfig(level=logging.DEBUG)
@@ -98,7 +100,16 @@ def add_to_wishlist(current_user):
         )
         
         db.session.add(new_wishlist_item)
-        db.session.commit()
+        try:
+            db.session.commit()
+        except IntegrityError:
+            # A concurrent add of the same product won the unique index.
+            db.session.rollback()
+            return jsonify({
+                "success": False,
+                "message": "Product already in wishlist"
+            }), 400
+        trending.record(product.id, WISHLIST_WEIGHT)
         
         logger.info(f"Product {product_id} added to wishlist for user {current_user.id}")
         return jsonify({
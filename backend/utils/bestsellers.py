@@ -0,0 +1,96 @@
+import datetime
+import heapq
+import threading
+from collections import Counter
+
+
+class BestsellerRanking:
+    """Rolling-window units-sold ranking maintained from new order lines.
+
+    Quantities are bucketed per order day so that days falling out of the
+    window can be subtracted without rescanning orders. After each refresh the
+    top ``max_size`` products are precomputed, so reads are O(k).
+
+    Order ids are allocated before their transaction commits, so an order can
+    become visible after a higher id was already folded in. Refreshes re-scan
+    the ``overlap`` ids below the watermark (see ``scan_from``) and skip orders
+    already applied, so such late commits are counted once.
+    """
+
+    def __init__(self, window_days=30, max_size=50, overlap=1000):
+        self.window_days = window_days
+        self.max_size = max_size
+        self.overlap = overlap
+        self.last_order_id = 0
+        self._applied_orders = set()
+        self.loaded = False
+        self.version = 0
+        self._buckets = {}
+        self._totals = Counter()
+        self._top = []
+        self._lock = threading.Lock()
+        self.refresh_lock = threading.Lock()
+
+    def init_app(self, app):
+        self.window_days = app.config.get("BESTSELLERS_WINDOW_DAYS", self.window_days)
+        self.max_size = app.config.get("BESTSELLERS_MAX_SIZE", self.max_size)
+        self.overlap = app.config.get("BESTSELLERS_OVERLAP_ORDERS", self.overlap)
+        app.extensions["bestsellers"] = self
+
+    def window_start(self, today=None):
+        today = today or datetime.datetime.utcnow().date()
+        return today - datetime.timedelta(days=self.window_days - 1)
+
+    def scan_from(self):
+        """Return the order id after which the next refresh should read lines."""
+        with self._lock:
+            return max(0, self.last_order_id - self.overlap)
+
+    def apply(self, rows, last_order_id=None, today=None):
+        """Fold ``(order_id, product_id, quantity, order_date)`` rows into the ranking.
+
+        Rows of orders already applied by an earlier call are ignored.
+        """
+        today = today or datetime.datetime.utcnow().date()
+        start = self.window_start(today)
+        with self._lock:
+            if last_order_id is not None:
+                self.last_order_id = max(self.last_order_id, last_order_id)
+            applied = set()
+            for order_id, product_id, quantity, order_date in rows:
+                if order_id in self._applied_orders:
+                    continue
+                applied.add(order_id)
+                self.last_order_id = max(self.last_order_id, order_id)
+                day = order_date.date() if isinstance(order_date, datetime.datetime) else (order_date or today)
+                if day < start or not quantity:
+                    continue
+                self._buckets.setdefault(day, Counter())[product_id] += quantity
+                self._totals[product_id] += quantity
+
+            floor = self.last_order_id - self.overlap
+            self._applied_orders = {order_id for order_id in self._applied_orders | applied if order_id > floor}
+
+            for day in [day for day in self._buckets if day < start]:
+                self._totals.subtract(self._buckets.pop(day))
+            self._totals = Counter({product_id: units for product_id, units in self._totals.items() if units > 0})
+
+            top = heapq.nlargest(self.max_size, self._totals.items(), key=lambda item: (item[1], -item[0]))
+            if top != self._top:
+                self._top = top
+                self.version += 1
+            self.loaded = True
+
+    def top(self, k):
+        with self._lock:
+            return self._top[:k]
+
+    def stats(self):
+        with self._lock:
+            return {
+                "version": self.version,
+                "window_days": self.window_days,
+                "tracked_products": len(self._totals),
+                "last_order_id": self.last_order_id,
+                "overlap": self.overlap,
+            }
@@ -0,0 +1,79 @@
+import threading
+from collections import OrderedDict
+
+from backend.utils.generations import UserGenerations
+
+
+class CartSummaryCache:
+    """Bounded LRU cache of per-user cart summaries (item count and total).
+
+    Cart mutation routes drop or replace a user's entry after they commit.
+    Each user's ``version(user_id)`` moves when that user's cart is
+    invalidated, so a summary read from the database before a concurrent write
+    is never stored over the newer state, and writes by other users do not
+    block the store.
+    Entries also remember the catalog version they were priced at, so admin
+    price changes make them stale without touching this cache.
+    """
+
+    def __init__(self, maxsize=4096):
+        self.maxsize = maxsize
+        self._versions = UserGenerations(maxsize)
+        self._entries = OrderedDict()
+        self._lock = threading.Lock()
+        self.hits = 0
+        self.misses = 0
+        self.invalidations = 0
+
+    def init_app(self, app):
+        self.maxsize = app.config.get("CART_SUMMARY_CACHE_SIZE", self.maxsize)
+        self._versions.maxsize = self.maxsize
+        app.extensions["cart_summaries"] = self
+
+    def get(self, user_id, catalog_version):
+        with self._lock:
+            entry = self._entries.get(user_id)
+            if entry is None or entry[0] != catalog_version:
+                self.misses += 1
+                return None
+            self._entries.move_to_end(user_id)
+            self.hits += 1
+            return entry[1]
+
+    def version(self, user_id):
+        with self._lock:
+            return self._versions.current(user_id)
+
+    def set(self, user_id, summary, version, catalog_version):
+        if self.maxsize <= 0:
+            return summary
+        with self._lock:
+            if version == self._versions.current(user_id):
+                self._entries[user_id] = (catalog_version, summary)
+                self._entries.move_to_end(user_id)
+                while len(self._entries) > self.maxsize:
+                    self._entries.popitem(last=False)
+        return summary
+
+    def invalidate(self, user_id):
+        with self._lock:
+            self._versions.bump(user_id)
+            if self._entries.pop(user_id, None) is not None:
+                self.invalidations += 1
+
+    def clear(self):
+        with self._lock:
+            self._versions.bump_all()
+            self._entries.clear()
+
+    def stats(self):
+        with self._lock:
+            lookups = self.hits + self.misses
+            return {
+                "size": len(self._entries),
+                "maxsize": self.maxsize,
+                "hits": self.hits,
+                "misses": self.misses,
+                "hit_rate": round(self.hits / lookups, 4) if lookups else 0.0,
+                "invalidations": self.invalidations,
+            }
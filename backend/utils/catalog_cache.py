@@ -0,0 +1,75 @@
+import hashlib
+import threading
+from collections import OrderedDict
+
+
+class CatalogCache:
+    """Read-through cache of serialized catalog responses.
+
+    Every entry is stamped with the catalog version it was built from. Admin
+    writes call ``bump()``, which makes all older entries stale at once without
+    having to know which keys they affect. Serialized (string) entries also
+    carry a strong ETag computed from the body so conditional requests can be
+    answered cheaply; other values are cached as-is for callers that still need
+    to merge per-request fields in.
+
+    A cache created with a ``parent`` shares the parent's version, so a bump of
+    the catalog also invalidates it while its entries are evicted separately.
+    ``name`` is the extension name; ``<NAME>_SIZE`` in config sizes the cache.
+    """
+
+    def __init__(self, maxsize=256, parent=None, name="catalog_cache"):
+        self.maxsize = maxsize
+        self.parent = parent
+        self.name = name
+        self._version = 0
+        self._entries = OrderedDict()
+        self._lock = threading.Lock()
+        self.hits = 0
+        self.misses = 0
+
+    def init_app(self, app):
+        self.maxsize = app.config.get(f"{self.name.upper()}_SIZE", self.maxsize)
+        app.extensions[self.name] = self
+
+    @property
+    def version(self):
+        return self.parent.version if self.parent is not None else self._version
+
+    def get(self, key):
+        with self._lock:
+            entry = self._entries.get(key)
+            if entry is None or entry[0] != self.version:
+                self.misses += 1
+                return None
+            self._entries.move_to_end(key)
+            self.hits += 1
+            return entry[1], entry[2]
+
+    def set(self, key, body, version):
+        etag = hashlib.sha1(body.encode("utf-8")).hexdigest() if isinstance(body, str) else None
+        with self._lock:
+            if version == self.version:
+                self._entries[key] = (version, body, etag)
+                self._entries.move_to_end(key)
+                while len(self._entries) > self.maxsize:
+                    self._entries.popitem(last=False)
+        return body, etag
+
+    def bump(self):
+        with self._lock:
+            self._version += 1
+            self._entries.clear()
+            return self.version
+
+    def stats(self):
+        with self._lock:
+            lookups = self.hits + self.misses
+            return {
+                "version": self.version,
+                "size": len(self._entries),
+                "maxsize": self.maxsize,
+                "hits": self.hits,
+                "misses": self.misses,
+                "hit_rate": round(self.hits / lookups, 4) if lookups else 0.0,
+            }
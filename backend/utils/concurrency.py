@@ -0,0 +1,31 @@
+import logging
+import random
+import time
+
+from sqlalchemy.orm.exc import StaleDataError
+
+from backend.extensions import db
+
+logger = logging.getLogger(__name__)
+
+
+class ConcurrentUpdateError(Exception):
+    """A compare-and-swap write found that the row's version had moved on."""
+
+
+def run_with_retry(operation, attempts=3, backoff=0.01):
+    """Run ``operation()`` and retry it on a version conflict.
+
+    ``operation`` must re-read whatever it compares against, since the session
+    is rolled back before every retry. Waits grow exponentially with jitter;
+    the last conflict is re-raised once ``attempts`` are used up.
+    """
+    for attempt in range(1, attempts + 1):
+        try:
+            return operation()
+        except (StaleDataError, ConcurrentUpdateError) as e:
+            db.session.rollback()
+            if attempt == attempts:
+                raise
+            logger.info(f"Version conflict on attempt {attempt}/{attempts}, retrying: {str(e)}")
+            time.sleep(backoff * (2 ** (attempt - 1)) * (0.5 + random.random()))
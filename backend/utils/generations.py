@@ -0,0 +1,33 @@
+import itertools
+from collections import OrderedDict
+
+
+class UserGenerations:
+    """Bounded per-user invalidation counters for caches filled from the database.
+
+    A reader takes ``current(user_id)`` before its query and only stores the
+    result if the value is unchanged, so a write that lands in between is not
+    overwritten by the stale read. Users pushed out of the bounded map fall back
+    to ``floor``, which only ever rises, so an evicted user never returns to a
+    value a reader may still hold. Not locked; callers hold their cache's lock.
+    """
+
+    def __init__(self, maxsize=4096):
+        self.maxsize = maxsize
+        self.floor = 0
+        self._counter = itertools.count(1)
+        self._generations = OrderedDict()
+
+    def current(self, user_id):
+        return self._generations.get(user_id, self.floor)
+
+    def bump(self, user_id):
+        self._generations[user_id] = next(self._counter)
+        self._generations.move_to_end(user_id)
+        while len(self._generations) > max(self.maxsize, 1):
+            _, generation = self._generations.popitem(last=False)
+            self.floor = max(self.floor, generation)
+
+    def bump_all(self):
+        self._generations.clear()
+        self.floor = next(self._counter)
@@ -0,0 +1,39 @@
+from flask import current_app
+from itsdangerous import BadSignature, URLSafeTimedSerializer
+
+GUEST_CART_SALT = "guest-cart"
+MAX_LINE_QUANTITY = 999
+
+
+class InvalidGuestCart(ValueError):
+    pass
+
+
+def guest_cart_serializer():
+    return URLSafeTimedSerializer(current_app.config["SECRET_KEY"], salt=GUEST_CART_SALT)
+
+
+def dump_guest_cart(items):
+    """Sign ``{product_id: quantity}`` as a compact URL-safe token."""
+    return guest_cart_serializer().dumps([[product_id, quantity] for product_id, quantity in items.items()])
+
+
+def load_guest_cart(token):
+    """Return ``{product_id: quantity}`` from a signed token; an empty token is an empty cart."""
+    if not token:
+        return {}
+    try:
+        pairs = guest_cart_serializer().loads(token, max_age=current_app.config["GUEST_CART_MAX_AGE"])
+    except BadSignature as e:
+        raise InvalidGuestCart("Guest cart token is invalid or expired") from e
+
+    if not isinstance(pairs, list) or len(pairs) > current_app.config["GUEST_CART_MAX_ITEMS"]:
+        raise InvalidGuestCart("Guest cart token is malformed")
+    items = {}
+    for pair in pairs:
+        if (not isinstance(pair, list) or len(pair) != 2
+                or not all(isinstance(value, int) and not isinstance(value, bool) for value in pair)
+                or pair[0] <= 0 or not 0 < pair[1] <= MAX_LINE_QUANTITY):
+            raise InvalidGuestCart("Guest cart token is malformed")
+        items[pair[0]] = pair[1]
+    return items
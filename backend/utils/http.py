@@ -0,0 +1,33 @@
+from flask import current_app, request, json, stream_with_context
+
+
+def conditional_json_response(body, etag, status=200):
+    response = current_app.response_class(body, status=status, mimetype="application/json")
+    response.set_etag(etag)
+    response.cache_control.no_cache = True
+    return response.make_conditional(request)
+
+
+def stream_json_list(result, key, row_mapper, batch_size=500, **fields):
+    """Stream ``{**fields, key: [...]}`` from a DB result without materializing it.
+
+    Rows are pulled ``batch_size`` at a time with ``fetchmany`` so, combined with
+    the ``stream_results`` execution option, memory stays flat regardless of
+    table size.
+    """
+    def generate():
+        try:
+            head = json.dumps(fields)
+            yield head[:-1] + (", " if fields else "") + json.dumps(key) + ": ["
+            separator = ""
+            while True:
+                rows = result.fetchmany(batch_size)
+                if not rows:
+                    break
+                yield separator + ",".join(json.dumps(row_mapper(row)) for row in rows)
+                separator = ","
+            yield "]}"
+        finally:
+            result.close()
+
+    return current_app.response_class(stream_with_context(generate()), mimetype="application/json")
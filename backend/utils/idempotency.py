@@ -0,0 +1,134 @@
+import datetime
+import hashlib
+import logging
+from functools import wraps
+
+from flask import current_app, jsonify, make_response, request
+from sqlalchemy import delete, update
+from sqlalchemy.exc import IntegrityError, SQLAlchemyError
+
+from backend.extensions import db
+from backend.models import IdempotencyKey
+from backend.utils.identity_cache import CachedUser
+
+logger = logging.getLogger(__name__)
+
+IDEMPOTENCY_HEADER = "Idempotency-Key"
+MAX_KEY_LENGTH = 255
+IN_PROGRESS_TIMEOUT = 300
+
+
+def request_fingerprint():
+    digest = hashlib.sha256()
+    digest.update(request.method.encode("utf-8"))
+    digest.update(request.path.encode("utf-8"))
+    digest.update(request.get_data(cache=True))
+    return digest.hexdigest()
+
+
+def purge_idempotency_keys():
+    cutoff = datetime.datetime.utcnow() - datetime.timedelta(seconds=current_app.config["IDEMPOTENCY_KEY_TTL_SECONDS"])
+    result = db.session.execute(delete(IdempotencyKey.__table__).where(IdempotencyKey.created_at < cutoff))
+    db.session.commit()
+    logger.info(f"Purged {result.rowcount} expired idempotency keys")
+    return {"purged": result.rowcount}
+
+
+def reserve_key(key, user_id, fingerprint):
+    """Claim ``key`` for this request; returns None when claimed, else the row holding it.
+
+    Expired rows, and reservations abandoned mid-request for longer than
+    IN_PROGRESS_TIMEOUT, are replaced.
+    """
+    now = datetime.datetime.utcnow()
+    expired_before = now - datetime.timedelta(seconds=current_app.config["IDEMPOTENCY_KEY_TTL_SECONDS"])
+    abandoned_before = now - datetime.timedelta(seconds=IN_PROGRESS_TIMEOUT)
+    for _ in range(3):
+        try:
+            db.session.add(IdempotencyKey(idempotency_key=key, endpoint=request.endpoint,
+                                          user_id=user_id, request_hash=fingerprint))
+            db.session.commit()
+            return None
+        except IntegrityError:
+            db.session.rollback()
+
+        existing = IdempotencyKey.query.filter_by(
+            idempotency_key=key, endpoint=request.endpoint, user_id=user_id
+        ).first()
+        if existing is None:
+            continue
+        stale_before = abandoned_before if existing.status_code is None else expired_before
+        if existing.created_at >= stale_before:
+            return existing
+        db.session.delete(existing)
+        db.session.commit()
+    return IdempotencyKey(idempotency_key=key, request_hash=fingerprint, status_code=None)
+
+
+def idempotent(f):
+    """Replay the stored response when a request repeats its ``Idempotency-Key`` header.
+
+    Keys are scoped to the endpoint and the authenticated user, so this goes
+    below ``token_required``; unauthenticated routes cannot use it. The key is
+    reserved before the handler runs, so a concurrent duplicate gets a 409
+    instead of running the handler twice. Any response below 500 (except 409)
+    is stored for ``IDEMPOTENCY_KEY_TTL_SECONDS``; server errors release the
+    key so the client can retry.
+    """
+    @wraps(f)
+    def decorated(*args, **kwargs):
+        key = request.headers.get(IDEMPOTENCY_HEADER)
+        if not key:
+            return f(*args, **kwargs)
+        if len(key) > MAX_KEY_LENGTH:
+            return jsonify({"message": f"{IDEMPOTENCY_HEADER} must be at most {MAX_KEY_LENGTH} characters"}), 400
+
+        if not args or not isinstance(args[0], CachedUser):
+            raise RuntimeError(f"{f.__name__} must be wrapped in token_required to use idempotent")
+        user_id = args[0].id
+        fingerprint = request_fingerprint()
+        try:
+            existing = reserve_key(key, user_id, fingerprint)
+        except SQLAlchemyError as e:
+            db.session.rollback()
+            logger.error(f"Could not reserve idempotency key for {request.endpoint}: {str(e)}")
+            return jsonify({"message": "Database error", "error": str(e)}), 500
+
+        if existing is not None:
+            if existing.request_hash != fingerprint:
+                return jsonify({"message": f"{IDEMPOTENCY_HEADER} was already used with a different request"}), 422
+            if existing.status_code is None:
+                return jsonify({"message": "A request with this Idempotency-Key is still in progress"}), 409
+            logger.info(f"Replaying stored response for {request.endpoint} with key {key}")
+            response = current_app.response_class(existing.response_body, status=existing.status_code,
+                                                  mimetype="application/json")
+            response.headers["Idempotent-Replayed"] = "true"
+            return response
+
+        row_filter = (
+            IdempotencyKey.idempotency_key == key,
+            IdempotencyKey.endpoint == request.endpoint,
+            IdempotencyKey.user_id == user_id,
+        )
+        try:
+            response = make_response(f(*args, **kwargs))
+        except Exception:
+            db.session.rollback()
+            db.session.execute(delete(IdempotencyKey.__table__).where(*row_filter))
+            db.session.commit()
+            raise
+
+        try:
+            if response.status_code >= 500 or response.status_code == 409:
+                db.session.execute(delete(IdempotencyKey.__table__).where(*row_filter))
+            else:
+                db.session.execute(update(IdempotencyKey.__table__).where(*row_filter).values(
+                    status_code=response.status_code, response_body=response.get_data(as_text=True)
+                ))
+            db.session.commit()
+        except SQLAlchemyError as e:
+            db.session.rollback()
+            logger.error(f"Could not store idempotent response for {request.endpoint}: {str(e)}")
+        return response
+
+    return decorated
@@ -0,0 +1,117 @@
+import threading
+import time
+from collections import OrderedDict, namedtuple
+
+from backend.utils.generations import UserGenerations
+
+
+class CachedUser(namedtuple("CachedUser", ["id", "username", "user_role"])):
+    __slots__ = ()
+
+    @property
+    def is_admin(self):
+        return self.user_role == "Admin"
+
+
+class IdentityCache:
+    """Bounded LRU cache of authenticated identities with a per-entry TTL.
+
+    Entries are keyed by (user_id, token) and only hold the fields routes read
+    from ``current_user``. A per-user index lets writes to a user drop every
+    token cached for them in one call. Callers take ``generation(user_id)``
+    before loading the user, and ``set`` skips the store if the user was
+    invalidated since, so a stale role cannot outlive an admin update.
+    """
+
+    def __init__(self, maxsize=1024, ttl=300):
+        self.maxsize = maxsize
+        self.ttl = ttl
+        self._entries = OrderedDict()
+        self._keys_by_user = {}
+        self._generations = UserGenerations(maxsize)
+        self._lock = threading.Lock()
+        self.hits = 0
+        self.misses = 0
+        self.evictions = 0
+        self.invalidations = 0
+
+    def init_app(self, app):
+        self.maxsize = app.config.get("IDENTITY_CACHE_SIZE", self.maxsize)
+        self.ttl = app.config.get("IDENTITY_CACHE_TTL", self.ttl)
+        self._generations.maxsize = self.maxsize
+        app.extensions["identity_cache"] = self
+
+    def get(self, user_id, token):
+        key = (user_id, token)
+        with self._lock:
+            entry = self._entries.get(key)
+            if entry is None:
+                self.misses += 1
+                return None
+            user, expires_at = entry
+            if expires_at <= time.monotonic():
+                self._remove(key)
+                self.misses += 1
+                return None
+            self._entries.move_to_end(key)
+            self.hits += 1
+            return user
+
+    def generation(self, user_id):
+        with self._lock:
+            return self._generations.current(user_id)
+
+    def set(self, user_id, token, user, generation):
+        key = (user_id, token)
+        cached = CachedUser(user.id, user.username, user.user_role)
+        if self.maxsize <= 0:
+            return cached
+        with self._lock:
+            if generation != self._generations.current(user_id):
+                return cached
+            if key in self._entries:
+                self._entries.move_to_end(key)
+            self._entries[key] = (cached, time.monotonic() + self.ttl)
+            self._keys_by_user.setdefault(user_id, set()).add(key)
+            while len(self._entries) > self.maxsize:
+                oldest = next(iter(self._entries))
+                self._remove(oldest)
+                self.evictions += 1
+        return cached
+
+    def invalidate(self, user_id):
+        with self._lock:
+            self._generations.bump(user_id)
+            keys = self._keys_by_user.pop(user_id, ())
+            for key in keys:
+                self._entries.pop(key, None)
+            if keys:
+                self.invalidations += 1
+
+    def clear(self):
+        with self._lock:
+            self._entries.clear()
+            self._keys_by_user.clear()
+            self._generations.bump_all()
+
+    def stats(self):
+        with self._lock:
+            lookups = self.hits + self.misses
+            return {
+                "size": len(self._entries),
+                "maxsize": self.maxsize,
+                "ttl": self.ttl,
+                "hits": self.hits,
+                "misses": self.misses,
+                "hit_rate": round(self.hits / lookups, 4) if lookups else 0.0,
+                "evictions": self.evictions,
+                "invalidations": self.invalidations,
+            }
+
+    def _remove(self, key):
+        self._entries.pop(key, None)
+        keys = self._keys_by_user.get(key[0])
+        if keys is not None:
+            keys.discard(key)
+            if not keys:
+                del self._keys_by_user[key[0]]
@@ -0,0 +1,76 @@
+import threading
+from concurrent.futures import ThreadPoolExecutor, TimeoutError as FutureTimeoutError
+from werkzeug.security import generate_password_hash, check_password_hash
+
+
+class HashingPoolFull(Exception):
+    pass
+
+
+class PasswordHasher:
+    """Runs password hashing on a dedicated, bounded thread pool.
+
+    At most ``workers`` hashes run at once and at most ``queue_depth`` more may
+    wait for a worker. Anything beyond that is rejected immediately with
+    HashingPoolFull so request threads are never tied up behind a login storm.
+    """
+
+    def __init__(self, workers=4, queue_depth=16, timeout=10):
+        self.workers = workers
+        self.queue_depth = queue_depth
+        self.timeout = timeout
+        self._executor = None
+        self._lock = threading.Lock()
+        self.in_flight = 0
+        self.rejected = 0
+
+    def init_app(self, app):
+        self.workers = app.config.get("HASH_POOL_WORKERS", self.workers)
+        self.queue_depth = app.config.get("HASH_POOL_QUEUE_DEPTH", self.queue_depth)
+        self.timeout = app.config.get("HASH_POOL_TIMEOUT", self.timeout)
+        with self._lock:
+            if self._executor is not None:
+                self._executor.shutdown(wait=False)
+            self._executor = None
+        app.extensions["password_hasher"] = self
+
+    def generate(self, password):
+        return self._run(generate_password_hash, password)
+
+    def check(self, pwhash, password):
+        return self._run(check_password_hash, pwhash, password)
+
+    def stats(self):
+        with self._lock:
+            return {
+                "workers": self.workers,
+                "queue_depth": self.queue_depth,
+                "in_flight": self.in_flight,
+                "rejected": self.rejected,
+            }
+
+    def _run(self, fn, *args):
+        with self._lock:
+            if self.in_flight >= self.workers + self.queue_depth:
+                self.rejected += 1
+                raise HashingPoolFull("Password hashing pool is saturated")
+            if self._executor is None:
+                self._executor = ThreadPoolExecutor(
+                    max_workers=self.workers, thread_name_prefix="password-hash"
+                )
+            self.in_flight += 1
+            executor = self._executor
+        try:
+            future = executor.submit(fn, *args)
+        except Exception:
+            self._release()
+            raise
+        future.add_done_callback(self._release)
+        try:
+            return future.result(timeout=self.timeout)
+        except FutureTimeoutError:
+            raise HashingPoolFull("Timed out waiting for a password hashing worker")
+
+    def _release(self, _future=None):
+        with self._lock:
+            self.in_flight -= 1
@@ -0,0 +1,79 @@
+import logging
+import threading
+import time
+
+logger = logging.getLogger(__name__)
+
+
+class Scheduler:
+    """Runs registered jobs periodically on one daemon thread inside an app context.
+
+    Jobs are plain callables; whatever a job returns is kept as its
+    ``last_result`` in ``stats()``. A failing job is logged and retried on its next
+    interval. The database session is removed after every run so jobs never
+    hold a connection between ticks.
+    """
+
+    def __init__(self, tick=1.0):
+        self.tick = tick
+        self.app = None
+        self._jobs = {}
+        self._lock = threading.Lock()
+        self._stop = threading.Event()
+        self._thread = None
+
+    def init_app(self, app):
+        self.app = app
+        app.extensions["scheduler"] = self
+
+    def add_job(self, name, func, interval, run_immediately=False):
+        with self._lock:
+            next_run = time.monotonic() if run_immediately else time.monotonic() + interval
+            self._jobs[name] = {"func": func, "interval": interval, "next_run": next_run,
+                                "runs": 0, "failures": 0, "last_duration": None, "last_result": None}
+
+    def run_job(self, name):
+        job = self._jobs[name]
+        started = time.monotonic()
+        try:
+            with self.app.app_context():
+                from backend.extensions import db
+                try:
+                    job["last_result"] = job["func"]()
+                finally:
+                    db.session.remove()
+            job["runs"] += 1
+        except Exception as e:
+            job["failures"] += 1
+            logger.error(f"Scheduled job {name} failed: {str(e)}")
+        finally:
+            job["last_duration"] = round(time.monotonic() - started, 4)
+            job["next_run"] = time.monotonic() + job["interval"]
+
+    def start(self):
+        if self._thread is not None and self._thread.is_alive():
+            return
+        self._stop.clear()
+        self._thread = threading.Thread(target=self._loop, name="scheduler", daemon=True)
+        self._thread.start()
+
+    def stop(self):
+        self._stop.set()
+        if self._thread is not None:
+            self._thread.join()
+            self._thread = None
+
+    def stats(self):
+        with self._lock:
+            return {
+                name: {key: job[key] for key in ("interval", "runs", "failures", "last_duration", "last_result")}
+                for name, job in self._jobs.items()
+            }
+
+    def _loop(self):
+        while not self._stop.wait(self.tick):
+            now = time.monotonic()
+            with self._lock:
+                due = [name for name, job in self._jobs.items() if job["next_run"] <= now]
+            for name in due:
+                self.run_job(name)
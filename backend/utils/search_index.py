@@ -0,0 +1,96 @@
+import math
+import re
+import threading
+from collections import Counter, defaultdict
+
+TOKEN_PATTERN = re.compile(r"[a-z0-9]+")
+
+
+def tokenize(value):
+    if not value:
+        return []
+    return TOKEN_PATTERN.findall(str(value).lower())
+
+
+class ProductSearchIndex:
+    """In-memory inverted index over product names, descriptions and categories.
+
+    Postings map a term to ``{product_id: term_frequency}`` and queries are ranked
+    with Okapi BM25. Documents are replaced or removed one at a time so the
+    admin product routes can keep the index current without a rebuild.
+    """
+
+    def __init__(self, k1=1.2, b=0.75):
+        self.k1 = k1
+        self.b = b
+        self._postings = defaultdict(dict)
+        self._doc_terms = {}
+        self._doc_lengths = {}
+        self._total_length = 0
+        self._lock = threading.RLock()
+        self.ready = False
+
+    def build(self, rows):
+        with self._lock:
+            self._postings.clear()
+            self._doc_terms.clear()
+            self._doc_lengths.clear()
+            self._total_length = 0
+            for row in rows:
+                self._add(*row)
+            self.ready = True
+
+    def upsert(self, product_id, product_name, product_description, category_name, is_active=True):
+        with self._lock:
+            self._remove(product_id)
+            if is_active:
+                self._add(product_id, product_name, product_description, category_name)
+
+    def remove(self, product_id):
+        with self._lock:
+            self._remove(product_id)
+
+    def search(self, query, limit=20):
+        terms = set(tokenize(query))
+        if not terms:
+            return []
+        with self._lock:
+            doc_count = len(self._doc_lengths)
+            if doc_count == 0:
+                return []
+            avg_length = self._total_length / doc_count
+            scores = defaultdict(float)
+            for term in terms:
+                postings = self._postings.get(term)
+                if not postings:
+                    continue
+                idf = math.log(1 + (doc_count - len(postings) + 0.5) / (len(postings) + 0.5))
+                for product_id, tf in postings.items():
+                    norm = self.k1 * (1 - self.b + self.b * self._doc_lengths[product_id] / avg_length)
+                    scores[product_id] += idf * tf * (self.k1 + 1) / (tf + norm)
+        ranked = sorted(scores.items(), key=lambda item: (-item[1], item[0]))
+        return ranked[:limit]
+
+    def __len__(self):
+        return len(self._doc_lengths)
+
+    def _add(self, product_id, product_name, product_description, category_name):
+        terms = Counter(tokenize(product_name) + tokenize(product_description) + tokenize(category_name))
+        for term, tf in terms.items():
+            self._postings[term][product_id] = tf
+        length = sum(terms.values())
+        self._doc_terms[product_id] = list(terms)
+        self._doc_lengths[product_id] = length
+        self._total_length += length
+
+    def _remove(self, product_id):
+        terms = self._doc_terms.pop(product_id, None)
+        if terms is None:
+            return
+        for term in terms:
+            postings = self._postings.get(term)
+            if postings is not None:
+                postings.pop(product_id, None)
+                if not postings:
+                    del self._postings[term]
+        self._total_length -= self._doc_lengths.pop(product_id)
@@ -0,0 +1,74 @@
+import datetime
+import decimal
+
+from flask.json.provider import DefaultJSONProvider
+
+try:
+    import orjson
+except ImportError:
+    orjson = None
+
+
+def to_json_default(value):
+    if isinstance(value, decimal.Decimal):
+        return float(value)
+    if isinstance(value, (datetime.datetime, datetime.date, datetime.time)):
+        return value.isoformat()
+    return DefaultJSONProvider.default(value)
+
+
+class FastJSONProvider(DefaultJSONProvider):
+    """JSON provider backed by orjson when it is installed.
+
+    Decimal is encoded as a number and dates as ISO 8601 on both the orjson and
+    the stdlib fallback path, so routes can hand database values straight to
+    ``jsonify`` without converting them field by field.
+    """
+
+    sort_keys = False
+
+    # ``response()`` (and so ``jsonify``) always passes one of these; orjson
+    # output is already compact, and any indent is rendered as two spaces.
+    ORJSON_FORMAT_KWARGS = frozenset(("indent", "separators", "sort_keys"))
+
+    def dumps(self, obj, **kwargs):
+        if orjson is not None and self.ORJSON_FORMAT_KWARGS.issuperset(kwargs):
+            option = orjson.OPT_NON_STR_KEYS
+            if kwargs.get("indent"):
+                option |= orjson.OPT_INDENT_2
+            if kwargs.get("sort_keys", self.sort_keys):
+                option |= orjson.OPT_SORT_KEYS
+            return orjson.dumps(obj, default=to_json_default, option=option).decode("utf-8")
+        kwargs.setdefault("default", to_json_default)
+        kwargs.setdefault("sort_keys", self.sort_keys)
+        return super().dumps(obj, **kwargs)
+
+    def loads(self, s, **kwargs):
+        if orjson is not None and not kwargs:
+            return orjson.loads(s)
+        return super().loads(s, **kwargs)
+
+
+class RowMapper:
+    """Positional mapping from result rows to output dicts, built once per query shape.
+
+    Each field is either an output key or a ``(key, converter)`` pair; fields are
+    matched to row columns by position.
+    """
+
+    def __init__(self, *fields):
+        self.keys = tuple(field if isinstance(field, str) else field[0] for field in fields)
+        self.converters = tuple(
+            (position, field[1]) for position, field in enumerate(fields) if not isinstance(field, str)
+        )
+
+    def __call__(self, row):
+        if not self.converters:
+            return dict(zip(self.keys, row))
+        values = list(row)
+        for position, converter in self.converters:
+            values[position] = converter(values[position])
+        return dict(zip(self.keys, values))
+
+    def many(self, rows):
+        return [self(row) for row in rows]
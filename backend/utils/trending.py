@@ -0,0 +1,111 @@
+import heapq
+import math
+import threading
+import time
+
+CART_WEIGHT = 1.0
+WISHLIST_WEIGHT = 0.5
+ORDER_WEIGHT = 3.0
+
+
+class TrendingEngine:
+    """Exponentially decayed per-product activity scores.
+
+    Scores are stored scaled by ``exp(rate * (t - base))`` so recording an event
+    is a single O(1) addition and every stored score decays by the same factor;
+    the ranking therefore never needs rescoring. ``snapshot()`` rebases to the
+    current time, which keeps the scale bounded and drops negligible scores;
+    ``record()`` also rebases on its own if snapshots stop running.
+
+    Activity recorded since the last snapshot is also kept apart in
+    ``_unsaved``, so each process persists only its own new activity and
+    several workers can add to one shared snapshot table.
+    """
+
+    REBASE_HALF_LIVES = 64
+
+    def __init__(self, half_life=3600, max_size=50, min_score=0.01):
+        self.half_life = half_life
+        self.max_size = max_size
+        self.min_score = min_score
+        self._base = time.time()
+        self._scores = {}
+        self._unsaved = {}
+        self._lock = threading.Lock()
+        self.events = 0
+
+    @property
+    def rate(self):
+        return math.log(2) / self.half_life
+
+    def init_app(self, app):
+        self.half_life = app.config.get("TRENDING_HALF_LIFE_SECONDS", self.half_life)
+        self.max_size = app.config.get("TRENDING_MAX_SIZE", self.max_size)
+        app.extensions["trending"] = self
+
+    def record(self, product_id, weight=1.0, now=None):
+        now = now or time.time()
+        with self._lock:
+            if now - self._base > self.REBASE_HALF_LIVES * self.half_life:
+                self._rebase(now)
+            scaled = weight * math.exp(self.rate * (now - self._base))
+            self._scores[product_id] = self._scores.get(product_id, 0.0) + scaled
+            self._unsaved[product_id] = self._unsaved.get(product_id, 0.0) + scaled
+            self.events += 1
+
+    def top(self, n, now=None):
+        now = now or time.time()
+        with self._lock:
+            factor = math.exp(-self.rate * (now - self._base))
+            ranked = heapq.nlargest(n, self._scores.items(), key=lambda item: item[1])
+        return [(product_id, score * factor) for product_id, score in ranked if score * factor >= self.min_score]
+
+    def decayed(self, score, age):
+        """Return what ``score`` has decayed to after ``age`` seconds."""
+        return score * math.exp(-self.rate * max(0.0, age))
+
+    def snapshot(self, now=None):
+        """Rebase to ``now`` and return ``[(product_id, score)]`` recorded since the last snapshot.
+
+        The returned scores stop counting as unsaved; hand them to ``restore()``
+        if persisting them fails.
+        """
+        now = now or time.time()
+        with self._lock:
+            self._rebase(now)
+            scores, self._unsaved = list(self._unsaved.items()), {}
+            return scores
+
+    def restore(self, scores, taken_at):
+        """Mark ``[(product_id, score)]`` from a failed ``snapshot(taken_at)`` as unsaved again."""
+        with self._lock:
+            scale = math.exp(self.rate * (taken_at - self._base))
+            for product_id, score in scores:
+                self._unsaved[product_id] = self._unsaved.get(product_id, 0.0) + score * scale
+
+    def load(self, rows, now=None):
+        """Seed scores from ``(product_id, score, saved_at_epoch)`` snapshot rows."""
+        now = now or time.time()
+        with self._lock:
+            for product_id, score, saved_at in rows:
+                decayed = self.decayed(score, now - saved_at)
+                if decayed >= self.min_score:
+                    self._scores[product_id] = self._scores.get(product_id, 0.0) + decayed * math.exp(self.rate * (now - self._base))
+
+    def _rebase(self, now):
+        factor = math.exp(-self.rate * (now - self._base))
+        self._scores = {
+            product_id: score * factor
+            for product_id, score in self._scores.items()
+            if score * factor >= self.min_score
+        }
+        self._unsaved = {product_id: score * factor for product_id, score in self._unsaved.items()}
+        self._base = now
+
+    def stats(self):
+        with self._lock:
+            return {
+                "half_life": self.half_life,
+                "tracked_products": len(self._scores),
+                "events": self.events,
+            }
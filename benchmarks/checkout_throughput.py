@@ -0,0 +1,103 @@
+"""Concurrent checkout throughput with an oversell check.
+
+Gives every user a cart drawn from a few scarce products, so that together
+the carts ask for more units than are in stock. It then checks all users out
+from parallel threads and reports orders/sec and the response mix. Finally it
+verifies that, for every product, the units sold plus the remaining stock
+equal the starting stock and that no stock went negative. The exit status is
+1 on oversell.
+
+    python -m benchmarks.checkout_throughput --users 200 --threads 8
+    BENCH_DATABASE_URL=postgresql://... python -m benchmarks.checkout_throughput
+"""
+import argparse
+import queue
+import random
+import sys
+import threading
+
+from sqlalchemy import func
+
+from benchmarks.common import auth_headers, cleanup, make_app, run_threads, seed_catalog, seed_users
+from backend.extensions import db
+from backend.models import Cart, CartDetails, Order, OrderDetail, Product
+
+
+def seed_carts(app, user_ids, product_ids, lines_per_cart, max_quantity):
+    with app.app_context():
+        db.session.execute(Cart.__table__.insert(), [
+            {"user_id": user_id, "is_checked_out": False} for user_id in user_ids
+        ])
+        carts = db.session.query(Cart.id).order_by(Cart.id).all()
+        db.session.execute(CartDetails.__table__.insert(), [
+            {"cart_id": cart_id, "product_id": product_id, "quantity": random.randint(1, max_quantity),
+             "price": 5, "discount": 0}
+            for (cart_id,) in carts for product_id in random.sample(product_ids, lines_per_cart)
+        ])
+        db.session.commit()
+        return db.session.query(func.sum(CartDetails.quantity)).scalar()
+
+
+def check_out(app, pending, codes, lock):
+    client = app.test_client()
+    while True:
+        try:
+            user_id = pending.get_nowait()
+        except queue.Empty:
+            return
+        response = client.post("/checkout", headers=auth_headers(app, user_id),
+                               json={"shipping_address": "1 Main St", "payment_method": "PayPal"})
+        with lock:
+            codes[response.status_code] = codes.get(response.status_code, 0) + 1
+
+
+def oversold_products(app, initial_stock):
+    with app.app_context():
+        sold = dict(db.session.query(OrderDetail.product_id, func.sum(OrderDetail.quantity))
+                    .group_by(OrderDetail.product_id).all())
+        problems = []
+        for product_id, stock in db.session.query(Product.id, Product.stock).order_by(Product.id):
+            units_sold = int(sold.get(product_id, 0))
+            if stock < 0 or units_sold + stock != initial_stock:
+                problems.append((product_id, initial_stock, units_sold, stock))
+        return problems, sum(int(units) for units in sold.values())
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument("--users", type=int, default=200)
+    parser.add_argument("--threads", type=int, default=8)
+    parser.add_argument("--products", type=int, default=5)
+    parser.add_argument("--stock", type=int, default=150)
+    parser.add_argument("--seed", type=int, default=24)
+    args = parser.parse_args()
+    random.seed(args.seed)
+
+    app = make_app()
+    product_ids = seed_catalog(app, products=args.products, categories=1, stock=args.stock)
+    user_ids = [user_id for user_id, _ in seed_users(app, args.users)]
+    demand = seed_carts(app, user_ids, product_ids, lines_per_cart=min(2, args.products), max_quantity=3)
+
+    pending = queue.Queue()
+    for user_id in user_ids:
+        pending.put(user_id)
+    codes, lock = {}, threading.Lock()
+    elapsed = run_threads(args.threads, check_out, app, pending, codes, lock)
+
+    with app.app_context():
+        orders = db.session.query(func.count(Order.id)).scalar()
+    problems, units_sold = oversold_products(app, args.stock)
+    print(f"{args.users} checkouts on {args.threads} threads in {elapsed:.2f}s: "
+          f"{orders / elapsed:.0f} orders/s, responses {dict(sorted(codes.items()))}")
+    print(f"demand {demand} units, stock {args.stock * args.products} units, sold {units_sold} units")
+    if problems:
+        for product_id, initial, units, remaining in problems:
+            print(f"OVERSOLD product {product_id}: started {initial}, sold {units}, stock now {remaining}")
+    else:
+        print("no oversell: every product's units sold plus remaining stock equals its starting stock")
+    cleanup()
+    return 1 if problems else 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -0,0 +1,106 @@
+"""Shared setup for the benchmark scripts.
+
+Run the scripts from the repository root, e.g. ``python -m benchmarks.login_flood``.
+They use ``BENCH_DATABASE_URL`` when it is set (for example a scratch
+PostgreSQL database, which is dropped and recreated) and otherwise a
+throwaway SQLite file.
+"""
+import datetime
+import logging
+import os
+import statistics
+import tempfile
+import threading
+import time
+
+_db_fd, _db_path = tempfile.mkstemp(suffix=".db")
+os.environ["DATABASE_URL"] = os.environ.get("BENCH_DATABASE_URL") or "sqlite:///" + _db_path
+os.environ.setdefault("SECRET_KEY", "benchmark-secret-key-with-enough-bytes")
+os.environ["SCHEDULER_ENABLED"] = "False"
+
+import jwt  # noqa: E402
+from werkzeug.security import generate_password_hash  # noqa: E402
+
+from backend import create_app  # noqa: E402
+from backend.extensions import db  # noqa: E402
+from backend.models import Category, Product, User  # noqa: E402
+
+
+def make_app():
+    app = create_app()
+    # The routes log every request at DEBUG/INFO, which would dominate the timings.
+    logging.disable(logging.WARNING)
+    with app.app_context():
+        db.session.remove()
+        db.drop_all()
+        db.create_all()
+    return app
+
+
+def seed_catalog(app, products, categories=10, stock=1000, price=5):
+    """Insert ``products`` active products spread over ``categories``; returns product ids."""
+    with app.app_context():
+        db.session.execute(Category.__table__.insert(), [
+            {"category_name": f"Category {number}"} for number in range(1, categories + 1)
+        ])
+        db.session.execute(Product.__table__.insert(), [
+            {"product_name": f"Product {number}", "product_description": "", "price": price, "stock": stock,
+             "category_id": number % categories + 1, "discount": 0, "is_active": True}
+            for number in range(1, products + 1)
+        ])
+        db.session.commit()
+        return [product_id for (product_id,) in db.session.query(Product.id).order_by(Product.id)]
+
+
+def seed_users(app, count, password="password", method="pbkdf2:sha256:1000"):
+    """Insert ``count`` customers sharing one password hash; returns ``[(user_id, username)]``."""
+    pass_word = generate_password_hash(password, method=method)
+    with app.app_context():
+        db.session.execute(User.__table__.insert(), [
+            {"username": f"user{number}", "pass_word": pass_word, "email": f"user{number}@example.com",
+             "full_name": f"User {number}", "user_role": "Customer"}
+            for number in range(1, count + 1)
+        ])
+        db.session.commit()
+        return db.session.query(User.id, User.username).order_by(User.id).all()
+
+
+def auth_headers(app, user_id):
+    token = jwt.encode(
+        {"user_id": user_id, "exp": datetime.datetime.utcnow() + datetime.timedelta(hours=1)},
+        app.config["SECRET_KEY"], algorithm="HS256"
+    )
+    return {"Authorization": f"Bearer {token}"}
+
+
+def run_threads(count, target, *args):
+    threads = [threading.Thread(target=target, args=args) for _ in range(count)]
+    began = time.perf_counter()
+    for thread in threads:
+        thread.start()
+    for thread in threads:
+        thread.join()
+    return time.perf_counter() - began
+
+
+def percentile(samples, pct):
+    ordered = sorted(samples)
+    if not ordered:
+        return 0.0
+    index = min(len(ordered) - 1, max(0, round(pct / 100 * len(ordered)) - 1))
+    return ordered[index]
+
+
+def latency_summary(samples):
+    """Format latencies given in seconds as milliseconds."""
+    if not samples:
+        return "no samples"
+    return "n={:<6} mean={:8.2f}ms p50={:8.2f}ms p95={:8.2f}ms p99={:8.2f}ms".format(
+        len(samples), statistics.mean(samples) * 1000, percentile(samples, 50) * 1000,
+        percentile(samples, 95) * 1000, percentile(samples, 99) * 1000
+    )
+
+
+def cleanup():
+    os.close(_db_fd)
+    os.remove(_db_path)
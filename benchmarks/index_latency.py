@@ -0,0 +1,171 @@
+"""Hot-path query latency before and after the hot path index migration.
+
+Seeds a catalog with reviews, carts, orders and wishlists. It then times the
+query behind each endpoint twice: once with the migration's indexes dropped
+(its downgrade) and once with them built again (its upgrade).
+
+    python -m benchmarks.index_latency --iterations 300
+"""
+import argparse
+import datetime
+import importlib.util
+import os
+import random
+import time
+
+from alembic.migration import MigrationContext
+from alembic.operations import Operations
+from sqlalchemy import text
+
+from benchmarks.common import cleanup, make_app, percentile, seed_catalog, seed_users
+from backend.extensions import db
+from backend.models import Cart, CartDetails, Order, OrderDetail, ProductReview
+from backend.models.Wishlist import Wishlist
+from backend.routes.cart import CART_ITEMS_QUERY
+
+MIGRATION = os.path.join(os.path.dirname(os.path.dirname(os.path.abspath(__file__))),
+                         "migrations", "versions", "b56698593ac7_add_hot_path_indexes.py")
+
+# (endpoint, statement, parameters drawn from the seeded ids); statements mirror the routes.
+HOT_QUERIES = [
+    ("GET /product/<name>", text("""
+        SELECT p.id, p.product_name, p.price, p.stock, c.category_name, s.review_count, s.rating_sum,
+               CASE WHEN EXISTS (SELECT 1 FROM product_reviews r
+                                 WHERE r.product_id = p.id AND r.user_id = :user_id) THEN 1 ELSE 0 END
+        FROM products p
+        LEFT JOIN categories c ON p.category_id = c.id
+        LEFT JOIN product_rating_stats s ON s.product_id = p.id
+        WHERE p.product_name = :product_name
+    """), lambda seed: {"product_name": f"Product {seed.product()}", "user_id": seed.user()}),
+    ("GET /product/<name> reviews", text("""
+        SELECT pr.id, u.username, pr.rating, pr.review_text, pr.created_at
+        FROM product_reviews pr JOIN users u ON pr.user_id = u.id
+        WHERE pr.product_id = :product_id
+        ORDER BY pr.created_at DESC
+        LIMIT 10 OFFSET 0
+    """), lambda seed: {"product_id": seed.product()}),
+    ("GET /products?category_id", text("""
+        SELECT id, product_name, price, stock, discount, image_url FROM products
+        WHERE category_id = :category_id AND is_active = :active AND id > :after
+        ORDER BY id LIMIT 20
+    """), lambda seed: {"category_id": random.randint(1, seed.categories), "active": True, "after": 0}),
+    ("GET /cart (active cart)", text("""
+        SELECT id FROM cart WHERE user_id = :user_id AND is_checked_out = :checked_out
+    """), lambda seed: {"user_id": seed.user(), "checked_out": False}),
+    ("GET /cart (lines)", CART_ITEMS_QUERY, lambda seed: {"cart_id": random.choice(seed.cart_ids)}),
+    ("GET /order/<id>", text("""
+        SELECT od.product_id, od.quantity, od.price, od.discount FROM order_details od
+        WHERE od.order_id = :order_id
+    """), lambda seed: {"order_id": random.choice(seed.order_ids)}),
+    ("POST /wishlist/add (exists)", text("""
+        SELECT 1 FROM wishlist WHERE user_id = :user_id AND product_id = :product_id
+    """), lambda seed: {"user_id": seed.user(), "product_id": seed.product()}),
+]
+
+
+class Seed:
+    def __init__(self, product_ids, user_ids, categories):
+        self.product_ids = product_ids
+        self.user_ids = user_ids
+        self.categories = categories
+        self.cart_ids = []
+        self.order_ids = []
+
+    def product(self):
+        return random.choice(self.product_ids)
+
+    def user(self):
+        return random.choice(self.user_ids)
+
+
+def seed_activity(app, seed, reviews_per_user, lines_per_cart, orders_per_user):
+    now = datetime.datetime.utcnow()
+    with app.app_context():
+        reviews, wishlist, carts = [], [], []
+        for user_id in seed.user_ids:
+            for offset, product_id in enumerate(random.sample(seed.product_ids, reviews_per_user)):
+                reviews.append({"product_id": product_id, "user_id": user_id, "rating": random.randint(1, 5),
+                                "review_text": "", "created_at": now - datetime.timedelta(minutes=offset)})
+            wishlist.extend({"user_id": user_id, "product_id": product_id}
+                            for product_id in random.sample(seed.product_ids, 5))
+            carts.extend({"user_id": user_id, "is_checked_out": True, "created_date": now} for _ in range(3))
+            carts.append({"user_id": user_id, "is_checked_out": False, "created_date": now})
+        db.session.execute(ProductReview.__table__.insert(), reviews)
+        db.session.execute(Wishlist.__table__.insert(), wishlist)
+        db.session.execute(Cart.__table__.insert(), carts)
+
+        seed.cart_ids = [cart_id for (cart_id,) in db.session.query(Cart.id).filter(Cart.is_checked_out == False)]
+        db.session.execute(CartDetails.__table__.insert(), [
+            {"cart_id": cart_id, "product_id": product_id, "quantity": 1, "price": 5, "discount": 0}
+            for cart_id in seed.cart_ids for product_id in random.sample(seed.product_ids, lines_per_cart)
+        ])
+        db.session.execute(Order.__table__.insert(), [
+            {"user_id": user_id, "total_amount": 15, "shipping_address": "1 Main St", "status": "Pending",
+             "order_date": now}
+            for user_id in seed.user_ids for _ in range(orders_per_user)
+        ])
+        seed.order_ids = [order_id for (order_id,) in db.session.query(Order.id)]
+        db.session.execute(OrderDetail.__table__.insert(), [
+            {"order_id": order_id, "product_id": product_id, "quantity": 1, "price": 5, "discount": 0}
+            for order_id in seed.order_ids for product_id in random.sample(seed.product_ids, 3)
+        ])
+        db.session.commit()
+        return len(reviews), len(wishlist), len(carts)
+
+
+def run_migration(app, direction):
+    spec = importlib.util.spec_from_file_location("hot_path_indexes", MIGRATION)
+    migration = importlib.util.module_from_spec(spec)
+    spec.loader.exec_module(migration)
+    with app.app_context(), db.engine.begin() as connection:
+        with Operations.context(MigrationContext.configure(connection)):
+            getattr(migration, direction)()
+
+
+def time_queries(app, seed, iterations):
+    timings = {}
+    with app.app_context(), db.engine.connect() as connection:
+        for endpoint, statement, params in HOT_QUERIES:
+            samples = []
+            for _ in range(iterations):
+                bound = params(seed)
+                began = time.perf_counter()
+                connection.execute(statement, bound).fetchall()
+                samples.append(time.perf_counter() - began)
+            timings[endpoint] = samples
+    return timings
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument("--products", type=int, default=5000)
+    parser.add_argument("--users", type=int, default=2000)
+    parser.add_argument("--iterations", type=int, default=300)
+    parser.add_argument("--seed", type=int, default=13)
+    args = parser.parse_args()
+    random.seed(args.seed)
+
+    app = make_app()
+    categories = 20
+    product_ids = seed_catalog(app, products=args.products, categories=categories)
+    user_ids = [user_id for user_id, _ in seed_users(app, args.users)]
+    seed = Seed(product_ids, user_ids, categories)
+    reviews, wishlist, carts = seed_activity(app, seed, reviews_per_user=15, lines_per_cart=5, orders_per_user=5)
+    print(f"seeded {len(product_ids)} products, {len(user_ids)} users, {reviews} reviews, "
+          f"{wishlist} wishlist rows, {carts} carts, {len(seed.order_ids)} orders")
+
+    run_migration(app, "downgrade")
+    before = time_queries(app, seed, args.iterations)
+    run_migration(app, "upgrade")
+    after = time_queries(app, seed, args.iterations)
+
+    print(f"{'endpoint':<30} {'before p50':>11} {'before p99':>11} {'after p50':>10} {'after p99':>10} {'speedup':>8}")
+    for endpoint, _, _ in HOT_QUERIES:
+        b50, b99 = percentile(before[endpoint], 50) * 1000, percentile(before[endpoint], 99) * 1000
+        a50, a99 = percentile(after[endpoint], 50) * 1000, percentile(after[endpoint], 99) * 1000
+        print(f"{endpoint:<30} {b50:9.3f}ms {b99:9.3f}ms {a50:8.3f}ms {a99:8.3f}ms {b50 / a50 if a50 else 0:7.1f}x")
+    cleanup()
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,85 @@
+"""Browse latency while /login is flooded.
+
+Measures /products and /categories latency on their own, then again while
+flood threads hammer /login. The hashing pool should keep browse p99 close
+to the baseline and shed logins with 503 once its queue is full.
+
+    python -m benchmarks.login_flood --seconds 5 --flood-threads 32
+"""
+import argparse
+import threading
+import time
+
+from werkzeug.security import generate_password_hash
+
+from benchmarks.common import cleanup, latency_summary, make_app, run_threads, seed_catalog, seed_users
+from backend.extensions import password_hasher
+
+BROWSE_PATHS = ("/products", "/products?limit=20", "/categories")
+
+
+def browse(app, stop, samples):
+    client = app.test_client()
+    index = 0
+    while not stop.is_set():
+        began = time.perf_counter()
+        response = client.get(BROWSE_PATHS[index % len(BROWSE_PATHS)])
+        samples.append(time.perf_counter() - began)
+        assert response.status_code == 200, response.status_code
+        index += 1
+
+
+def flood(app, stop, users, codes, lock):
+    client = app.test_client()
+    index = 0
+    while not stop.is_set():
+        username = users[index % len(users)][1]
+        response = client.post("/login", json={"username": username, "pass_word": "password"})
+        with lock:
+            codes[response.status_code] = codes.get(response.status_code, 0) + 1
+        index += 1
+
+
+def measure(app, seconds, browse_threads, flood_threads=0, users=()):
+    stop = threading.Event()
+    samples, codes, lock = [], {}, threading.Lock()
+    threads = [threading.Thread(target=browse, args=(app, stop, samples)) for _ in range(browse_threads)]
+    threads += [threading.Thread(target=flood, args=(app, stop, users, codes, lock)) for _ in range(flood_threads)]
+    for thread in threads:
+        thread.start()
+    time.sleep(seconds)
+    stop.set()
+    for thread in threads:
+        thread.join()
+    return samples, codes
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument("--seconds", type=float, default=5)
+    parser.add_argument("--browse-threads", type=int, default=2)
+    parser.add_argument("--flood-threads", type=int, default=32)
+    parser.add_argument("--users", type=int, default=200)
+    args = parser.parse_args()
+
+    app = make_app()
+    seed_catalog(app, products=200)
+    # Seed with the production hash strength so each login costs a real PBKDF2 run.
+    users = seed_users(app, args.users, method=generate_password_hash("x").split("$", 1)[0])
+
+    # Warm the catalog cache, as a running server would have.
+    run_threads(1, lambda: [app.test_client().get(path) for path in BROWSE_PATHS])
+
+    baseline, _ = measure(app, args.seconds, args.browse_threads)
+    flooded, codes = measure(app, args.seconds, args.browse_threads, args.flood_threads, users)
+
+    print(f"hash pool: {password_hasher.workers} workers, queue depth {password_hasher.queue_depth}")
+    print(f"browse baseline     {latency_summary(baseline)}")
+    print(f"browse during flood {latency_summary(flooded)}")
+    print(f"login responses     {dict(sorted(codes.items()))} "
+          f"({sum(codes.values()) / args.seconds:.0f}/s over {args.flood_threads} threads)")
+    cleanup()
+
+
+if __name__ == "__main__":
+    main()
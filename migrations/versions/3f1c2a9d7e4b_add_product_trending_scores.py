@@ -0,0 +1,35 @@
+"""add product trending scores
+
+Revision ID: 3f1c2a9d7e4b
+Revises: b56698593ac7
+Create Date: 2026-10-17 04:12:31.504118
+
+"""
+from alembic import op
+import sqlalchemy as sa
+
+
+# revision identifiers, used by Alembic.
+revision = '3f1c2a9d7e4b'
+down_revision = 'b56698593ac7'
+branch_labels = None
+depends_on = None
+
+
+def upgrade():
+    # db.create_all() may already have created the table from the model.
+    inspector = sa.inspect(op.get_bind())
+    if 'product_trending_scores' in inspector.get_table_names():
+        return
+    op.create_table(
+        'product_trending_scores',
+        sa.Column('product_id', sa.Integer(), sa.ForeignKey('products.id'), primary_key=True),
+        sa.Column('score', sa.Float(), nullable=False),
+        sa.Column('updated_at', sa.DateTime(), nullable=False),
+    )
+
+
+def downgrade():
+    inspector = sa.inspect(op.get_bind())
+    if 'product_trending_scores' in inspector.get_table_names():
+        op.drop_table('product_trending_scores')
@@ -0,0 +1,42 @@
+"""add active cart unique index
+
+Revision ID: 8a4e6d0c5b21
+Revises: 3f1c2a9d7e4b
+Create Date: 2026-10-17 05:03:47.219884
+
+"""
+from alembic import op
+import sqlalchemy as sa
+
+
+# revision identifiers, used by Alembic.
+revision = '8a4e6d0c5b21'
+down_revision = '3f1c2a9d7e4b'
+branch_labels = None
+depends_on = None
+
+
+def upgrade():
+    inspector = sa.inspect(op.get_bind())
+    if 'uq_cart_user_active' in {index['name'] for index in inspector.get_indexes('cart')}:
+        return
+    # Close older duplicate open carts so the index can be built; the cart
+    # routes only ever read one open cart per user.
+    op.get_bind().execute(sa.text("""
+        UPDATE cart SET is_checked_out = :closed
+        WHERE is_checked_out = :open
+          AND id < (SELECT MAX(newer.id) FROM cart newer
+                    WHERE newer.user_id = cart.user_id AND newer.is_checked_out = :open)
+    """), {"open": False, "closed": True})
+    op.create_index(
+        'uq_cart_user_active', 'cart', ['user_id'], unique=True,
+        sqlite_where=sa.text('is_checked_out = 0'),
+        postgresql_where=sa.text('is_checked_out = false'),
+        mssql_where=sa.text('is_checked_out = 0')
+    )
+
+
+def downgrade():
+    inspector = sa.inspect(op.get_bind())
+    if 'uq_cart_user_active' in {index['name'] for index in inspector.get_indexes('cart')}:
+        op.drop_index('uq_cart_user_active', table_name='cart')
@@ -0,0 +1,180 @@
+"""add hot path indexes
+
+Revision ID: b56698593ac7
+Revises:
+Create Date: 2026-10-17 02:28:54.877323
+
+"""
+import logging
+import os
+
+from alembic import op
+import sqlalchemy as sa
+
+
+# revision identifiers, used by Alembic.
+revision = 'b56698593ac7'
+down_revision = None
+branch_labels = None
+depends_on = None
+
+logger = logging.getLogger('alembic.runtime.migration')
+
+
+# (name, table, columns, unique, covering columns for SQL Server / PostgreSQL)
+INDEXES = [
+    ('uq_products_product_name', 'products', ['product_name'], True, []),
+    ('ix_products_category_active', 'products', ['category_id', 'is_active', 'id'], False,
+     ['product_name', 'price', 'stock', 'discount', 'image_url']),
+    ('ix_cart_user_checked_out', 'cart', ['user_id', 'is_checked_out'], False, []),
+    ('ix_order_details_order_id', 'order_details', ['order_id'], False,
+     ['product_id', 'quantity', 'price', 'discount']),
+    ('ix_product_reviews_product_created', 'product_reviews', ['product_id', 'created_at'], False,
+     ['user_id', 'rating']),
+    ('uq_product_reviews_product_user', 'product_reviews', ['product_id', 'user_id'], True, []),
+    ('uq_wishlist_user_product', 'wishlist', ['user_id', 'product_id'], True, []),
+]
+
+
+def existing_indexes(inspector, table):
+    names = {index['name'] for index in inspector.get_indexes(table)}
+    names.update(constraint['name'] for constraint in inspector.get_unique_constraints(table))
+    return names
+
+
+def duplicate_product_names(bind):
+    # Every product after the oldest one with the same name.
+    rows = bind.execute(sa.text("""
+        SELECT id, product_name FROM products
+        WHERE product_name IN (SELECT product_name FROM products
+                               GROUP BY product_name HAVING COUNT(*) > 1)
+        ORDER BY product_name, id
+    """)).fetchall()
+    seen = set()
+    duplicates = []
+    for product_id, product_name in rows:
+        if product_name in seen:
+            duplicates.append((product_id, product_name))
+        seen.add(product_name)
+    return duplicates
+
+
+def rename_duplicate_product_names(bind, duplicates):
+    # Products are referenced by id elsewhere, so duplicates keep their rows
+    # and get their id appended to the name.
+    for product_id, product_name in duplicates:
+        new_name = f"{product_name} ({product_id})"
+        bind.execute(sa.text("UPDATE products SET product_name = :name WHERE id = :id"),
+                     {"name": new_name, "id": product_id})
+        logger.warning(f"Renamed product {product_id} from {product_name!r} to {new_name!r}")
+
+
+def duplicate_reviews(bind):
+    # Every review older than the same user's latest review of the product.
+    return bind.execute(sa.text("""
+        SELECT id, product_id, user_id FROM product_reviews
+        WHERE id < (SELECT MAX(newer.id) FROM product_reviews newer
+                    WHERE newer.product_id = product_reviews.product_id
+                      AND newer.user_id = product_reviews.user_id)
+        ORDER BY id
+    """)).fetchall()
+
+
+def delete_duplicate_reviews(bind, duplicates):
+    # Rating stats are cleared so the app rebuilds them from the remaining
+    # reviews on startup.
+    for review_id, product_id, user_id in duplicates:
+        bind.execute(sa.text("DELETE FROM product_reviews WHERE id = :id"), {"id": review_id})
+        logger.warning(f"Deleted review {review_id} by user {user_id} of product {product_id}")
+    if 'product_rating_stats' in sa.inspect(bind).get_table_names():
+        bind.execute(sa.text("DELETE FROM product_rating_stats"))
+
+
+def duplicate_wishlist_items(bind):
+    # Every wishlist row newer than the user's first one for the product.
+    return bind.execute(sa.text("""
+        SELECT id, user_id, product_id FROM wishlist
+        WHERE id > (SELECT MIN(older.id) FROM wishlist older
+                    WHERE older.user_id = wishlist.user_id
+                      AND older.product_id = wishlist.product_id)
+        ORDER BY id
+    """)).fetchall()
+
+
+def delete_duplicate_wishlist_items(bind, duplicates):
+    for item_id, user_id, product_id in duplicates:
+        bind.execute(sa.text("DELETE FROM wishlist WHERE id = :id"), {"id": item_id})
+        logger.warning(f"Deleted wishlist item {item_id} of user {user_id} for product {product_id}")
+
+
+# Existing duplicates would make the matching unique index fail. They are
+# only cleaned up when DEDUPLICATE_ENV is set, since downgrade() cannot bring
+# renamed products or deleted rows back. Each entry is (find, clean up,
+# describe one row).
+DEDUPLICATE_ENV = 'DEDUPLICATE_HOT_PATH_INDEXES'
+REPORTED_DUPLICATES = 20
+DEDUPLICATE = {
+    'uq_products_product_name': (
+        duplicate_product_names, rename_duplicate_product_names,
+        lambda row: f"product {row[0]} named {row[1]!r} like an older product"),
+    'uq_product_reviews_product_user': (
+        duplicate_reviews, delete_duplicate_reviews,
+        lambda row: f"review {row[0]} by user {row[2]} of product {row[1]} (not their latest)"),
+    'uq_wishlist_user_product': (
+        duplicate_wishlist_items, delete_duplicate_wishlist_items,
+        lambda row: f"wishlist item {row[0]} of user {row[1]} for product {row[2]} (not their first)"),
+}
+
+
+def duplicates_report(duplicates):
+    lines = ["Cannot add unique indexes while these rows are duplicates:"]
+    for name, rows in duplicates.items():
+        describe = DEDUPLICATE[name][2]
+        lines.append(f"  {name}:")
+        lines.extend(f"    {describe(row)}" for row in rows[:REPORTED_DUPLICATES])
+        if len(rows) > REPORTED_DUPLICATES:
+            lines.append(f"    ... and {len(rows) - REPORTED_DUPLICATES} more")
+    lines.append(
+        f"Fix them by hand, or set {DEDUPLICATE_ENV}=1 to rename the duplicate products and "
+        "delete the listed reviews and wishlist items. downgrade() cannot undo that cleanup."
+    )
+    return "\n".join(lines)
+
+
+def upgrade():
+    # Tables may already carry these indexes when they were created by
+    # db.create_all() from the current models, so only add what is missing.
+    bind = op.get_bind()
+    inspector = sa.inspect(bind)
+    tables = set(inspector.get_table_names())
+    missing = [
+        (name, table, columns, unique, include) for name, table, columns, unique, include in INDEXES
+        if table in tables and name not in existing_indexes(inspector, table)
+    ]
+
+    # Look for duplicates before changing anything, so a refusal leaves the
+    # database as it was.
+    duplicates = {}
+    for name, _, _, _, _ in missing:
+        if name in DEDUPLICATE:
+            rows = DEDUPLICATE[name][0](bind)
+            if rows:
+                duplicates[name] = rows
+    if duplicates and os.environ.get(DEDUPLICATE_ENV) != '1':
+        raise RuntimeError(duplicates_report(duplicates))
+
+    for name, table, columns, unique, include in missing:
+        if name in duplicates:
+            DEDUPLICATE[name][1](bind, duplicates[name])
+        op.create_index(
+            name, table, columns, unique=unique,
+            mssql_include=include, postgresql_include=include
+        )
+
+
+def downgrade():
+    inspector = sa.inspect(op.get_bind())
+    tables = set(inspector.get_table_names())
+    for name, table, _, _, _ in reversed(INDEXES):
+        if table in tables and name in existing_indexes(inspector, table):
+            op.drop_index(name, table_name=table)
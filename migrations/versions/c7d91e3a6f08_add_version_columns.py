@@ -0,0 +1,40 @@
+"""add version columns to cart_details and orders
+
+Revision ID: c7d91e3a6f08
+Revises: 8a4e6d0c5b21
+Create Date: 2026-10-17 05:41:09.662530
+
+"""
+from alembic import op
+import sqlalchemy as sa
+
+
+# revision identifiers, used by Alembic.
+revision = 'c7d91e3a6f08'
+down_revision = '8a4e6d0c5b21'
+branch_labels = None
+depends_on = None
+
+
+TABLES = ['cart_details', 'orders']
+
+
+def existing_columns(inspector, table):
+    return {column['name'] for column in inspector.get_columns(table)}
+
+
+def upgrade():
+    inspector = sa.inspect(op.get_bind())
+    for table in TABLES:
+        if 'version' in existing_columns(inspector, table):
+            continue
+        # The server default also covers rows still inserted by stored procedures.
+        op.add_column(table, sa.Column('version', sa.Integer(), nullable=False, server_default='1'))
+
+
+def downgrade():
+    inspector = sa.inspect(op.get_bind())
+    for table in reversed(TABLES):
+        if 'version' in existing_columns(inspector, table):
+            with op.batch_alter_table(table) as batch_op:
+                batch_op.drop_column('version')
@@ -0,0 +1,45 @@
+"""add idempotency keys
+
+Revision ID: e2b5f8a14c3d
+Revises: c7d91e3a6f08
+Create Date: 2026-10-17 06:27:55.381940
+
+"""
+from alembic import op
+import sqlalchemy as sa
+
+
+# revision identifiers, used by Alembic.
+revision = 'e2b5f8a14c3d'
+down_revision = 'c7d91e3a6f08'
+branch_labels = None
+depends_on = None
+
+
+def upgrade():
+    # db.create_all() may already have created the table from the model.
+    inspector = sa.inspect(op.get_bind())
+    if 'idempotency_keys' in inspector.get_table_names():
+        return
+    op.create_table(
+        'idempotency_keys',
+        sa.Column('id', sa.Integer(), primary_key=True, autoincrement=True),
+        sa.Column('idempotency_key', sa.String(length=255), nullable=False),
+        sa.Column('endpoint', sa.String(length=255), nullable=False),
+        sa.Column('user_id', sa.Integer(), nullable=False),
+        sa.Column('request_hash', sa.String(length=64), nullable=False),
+        sa.Column('status_code', sa.Integer(), nullable=True),
+        sa.Column('response_body', sa.Text(), nullable=True),
+        sa.Column('created_at', sa.DateTime(), nullable=False),
+    )
+    op.create_index('uq_idempotency_keys_key', 'idempotency_keys',
+                    ['idempotency_key', 'endpoint', 'user_id'], unique=True)
+    op.create_index('ix_idempotency_keys_created_at', 'idempotency_keys', ['created_at'])
+
+
+def downgrade():
+    inspector = sa.inspect(op.get_bind())
+    if 'idempotency_keys' in inspector.get_table_names():
+        op.drop_index('ix_idempotency_keys_created_at', table_name='idempotency_keys')
+        op.drop_index('uq_idempotency_keys_key', table_name='idempotency_keys')
+        op.drop_table('idempotency_keys')
@@ -0,0 +1,77 @@
+import os
+import tempfile
+
+import pytest
+from werkzeug.security import generate_password_hash
+
+# Config reads the environment at import time, so point it at a throwaway
+# SQLite database before the app package is imported.
+_db_fd, DB_PATH = tempfile.mkstemp(suffix=".db")
+os.environ["DATABASE_URL"] = "sqlite:///" + DB_PATH
+os.environ["SECRET_KEY"] = "test-secret-key-with-enough-bytes"
+os.environ["SCHEDULER_ENABLED"] = "False"
+
+from backend import create_app  # noqa: E402
+from backend.extensions import db, identity_cache, catalog_cache, cart_summaries  # noqa: E402
+from backend.models import Category, Product, User  # noqa: E402
+
+
+@pytest.fixture(scope="session")
+def app():
+    app = create_app()
+    app.config["TESTING"] = True
+    yield app
+    os.close(_db_fd)
+    os.remove(DB_PATH)
+
+
+@pytest.fixture(autouse=True)
+def clean_state(app):
+    with app.app_context():
+        db.session.remove()
+        db.drop_all()
+        db.create_all()
+    identity_cache.clear()
+    catalog_cache.bump()
+    cart_summaries.clear()
+    yield
+    with app.app_context():
+        db.session.remove()
+
+
+@pytest.fixture
+def client(app):
+    return app.test_client()
+
+
+@pytest.fixture
+def make_user(app, client):
+    """Create a user directly and return the Authorization header for them."""
+    def make(username, role="Customer", password="password"):
+        with app.app_context():
+            db.session.add(User(
+                username=username, pass_word=generate_password_hash(password, method="pbkdf2:sha256:1000"),
+                email=f"{username}@example.com", full_name=username, user_role=role
+            ))
+            db.session.commit()
+        response = client.post("/login", json={"username": username, "pass_word": password})
+        return {"Authorization": f"Bearer {response.get_json()['token']}"}
+    return make
+
+
+@pytest.fixture
+def make_product(app):
+    """Create an active product (and its category on first use) and return its id."""
+    def make(product_name, price=2.5, stock=100):
+        with app.app_context():
+            category = Category.query.filter_by(category_name="Cakes").first()
+            if category is None:
+                category = Category(category_name="Cakes")
+                db.session.add(category)
+                db.session.flush()
+            product = Product(product_name=product_name, product_description="", price=price,
+                              stock=stock, category_id=category.id, discount=0, is_active=True)
+            db.session.add(product)
+            db.session.commit()
+            return product.id
+    return make
@@ -0,0 +1,60 @@
+import threading
+
+from backend.extensions import db
+from backend.models import Cart, CartDetails
+
+THREADS = 8
+ADDS_PER_THREAD = 5
+
+
+def add_concurrently(app, headers, product_id, quantity=1):
+    results = []
+    start = threading.Barrier(THREADS)
+
+    def worker():
+        client = app.test_client()
+        start.wait()
+        for _ in range(ADDS_PER_THREAD):
+            response = client.post("/cart/add", headers=headers, json={"product_id": product_id, "quantity": quantity})
+            results.append((response.status_code, response.get_json().get("success")))
+
+    threads = [threading.Thread(target=worker) for _ in range(THREADS)]
+    for thread in threads:
+        thread.start()
+    for thread in threads:
+        thread.join()
+    return results
+
+
+def cart_lines(app, product_id):
+    with app.app_context():
+        carts = Cart.query.filter_by(is_checked_out=False).count()
+        lines = db.session.query(CartDetails.cart_id, CartDetails.quantity).filter_by(product_id=product_id).all()
+    return carts, lines
+
+
+def test_concurrent_adds_of_one_product_share_a_line(app, make_user, make_product):
+    product_id = make_product("Cupcake", stock=1000)
+    headers = make_user("shopper")
+
+    results = add_concurrently(app, headers, product_id)
+
+    assert results == [(200, True)] * (THREADS * ADDS_PER_THREAD)
+    carts, lines = cart_lines(app, product_id)
+    assert carts == 1
+    assert len(lines) == 1
+    assert lines[0].quantity == THREADS * ADDS_PER_THREAD
+
+
+def test_concurrent_adds_never_exceed_stock(app, make_user, make_product):
+    stock = 10
+    product_id = make_product("Donut", stock=stock)
+    headers = make_user("shopper")
+
+    results = add_concurrently(app, headers, product_id)
+
+    assert all(status == 200 for status, _ in results)
+    assert sum(1 for _, success in results if success) == stock
+    carts, lines = cart_lines(app, product_id)
+    assert carts == 1
+    assert [line.quantity for line in lines] == [stock]
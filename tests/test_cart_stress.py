@@ -0,0 +1,97 @@
+import threading
+import time
+
+THREADS = 8
+ROUNDS = 25
+# Every conflict costs a retry, so the compare-and-swap test uses fewer rounds.
+CAS_ROUNDS = 8
+# Deliberately low so the test only catches pathological slowdowns (for
+# example requests serializing behind a lock), not slow CI machines.
+MIN_REQUESTS_PER_SECOND = 20
+
+
+def hammer(app, worker):
+    """Run ``worker(client, tally)`` on THREADS threads and return (tally, elapsed seconds)."""
+    tally = {}
+    lock = threading.Lock()
+    start = threading.Barrier(THREADS)
+
+    def count(key):
+        with lock:
+            tally[key] = tally.get(key, 0) + 1
+
+    def run():
+        client = app.test_client()
+        start.wait()
+        worker(client, count)
+
+    threads = [threading.Thread(target=run) for _ in range(THREADS)]
+    began = time.perf_counter()
+    for thread in threads:
+        thread.start()
+    for thread in threads:
+        thread.join()
+    return tally, time.perf_counter() - began
+
+
+def cart_quantities(client, headers):
+    response = client.get("/cart", headers=headers)
+    assert response.status_code == 200
+    return {item["product_id"]: item["quantity"] for item in response.get_json()["data"]}
+
+
+def test_cart_survives_mixed_concurrent_writes(app, client, make_user, make_product):
+    cake = make_product("Cake", stock=10000)
+    tart = make_product("Tart", stock=10000)
+    headers = make_user("shopper")
+    client.post("/cart/add", headers=headers, json={"product_id": cake, "quantity": 1})
+    cake_line = client.get("/cart", headers=headers).get_json()["data"][0]["cart_item_id"]
+
+    def worker(client, count):
+        for round_number in range(ROUNDS):
+            if round_number % 2:
+                response = client.post("/cart/add", headers=headers, json={"product_id": tart, "quantity": 1})
+                count(("add", response.status_code, response.get_json().get("success")))
+            else:
+                response = client.post("/cart/update", headers=headers, json={"cart_item_id": cake_line, "change": 1})
+                count(("update", response.status_code, response.get_json().get("success")))
+            client.get("/cart/summary", headers=headers)
+
+    tally, elapsed = hammer(app, worker)
+
+    updates = tally.get(("update", 200, True), 0)
+    adds = tally.get(("add", 200, True), 0)
+    assert updates + adds == THREADS * ROUNDS, tally
+    assert cart_quantities(client, headers) == {cake: 1 + updates, tart: adds}
+
+    summary = client.get("/cart/summary", headers=headers).get_json()
+    assert summary["line_count"] == 2
+    assert summary["item_count"] == 1 + updates + adds
+
+    requests_per_second = 2 * THREADS * ROUNDS / elapsed
+    assert requests_per_second >= MIN_REQUESTS_PER_SECOND
+
+
+def test_versioned_updates_lose_no_increments(app, client, make_user, make_product):
+    cake = make_product("Cake", stock=10000)
+    headers = make_user("shopper")
+    client.post("/cart/add", headers=headers, json={"product_id": cake, "quantity": 1})
+    line = client.get("/cart", headers=headers).get_json()["data"][0]
+
+    def worker(client, count):
+        for _ in range(CAS_ROUNDS):
+            # Compare-and-swap loop: re-read the line after every version conflict.
+            while True:
+                current = client.get("/cart", headers=headers).get_json()["data"][0]
+                response = client.post("/cart/update", headers=headers, json={
+                    "cart_item_id": line["cart_item_id"], "change": 1, "version": current["version"]
+                })
+                count(response.status_code)
+                if response.status_code != 409:
+                    break
+
+    tally, _ = hammer(app, worker)
+
+    assert set(tally) <= {200, 409}, tally
+    assert tally[200] == THREADS * CAS_ROUNDS
+    assert cart_quantities(client, headers) == {cake: 1 + THREADS * CAS_ROUNDS}
@@ -0,0 +1,49 @@
+from backend.extensions import db
+from backend.models import Product
+
+
+def cart_line(client, headers):
+    return client.get("/cart", headers=headers).get_json()["data"][0]
+
+
+def test_update_cannot_raise_quantity_past_stock(client, make_user, make_product):
+    cake = make_product("Cake", stock=5)
+    headers = make_user("shopper")
+    client.post("/cart/add", headers=headers, json={"product_id": cake, "quantity": 4})
+    line = cart_line(client, headers)
+
+    response = client.post("/cart/update", headers=headers, json={"cart_item_id": line["cart_item_id"], "change": 2})
+    assert response.status_code == 400
+    assert response.get_json()["message"] == "Not enough stock available"
+
+    response = client.post("/cart/update", headers=headers, json={"cart_item_id": line["cart_item_id"], "change": 1})
+    assert response.status_code == 200
+    assert response.get_json()["new_quantity"] == 5
+
+
+def test_batch_update_cannot_raise_quantity_past_stock(client, make_user, make_product):
+    cake = make_product("Cake", stock=5)
+    headers = make_user("shopper")
+    client.post("/cart/add", headers=headers, json={"product_id": cake, "quantity": 5})
+    line = cart_line(client, headers)
+
+    response = client.post("/cart/batch", headers=headers, json={"operations": [
+        {"op": "update", "cart_item_id": line["cart_item_id"], "change": 1}
+    ]})
+    assert response.status_code == 400
+    assert response.get_json()["message"] == "Not enough stock available"
+    assert cart_line(client, headers)["quantity"] == 5
+
+
+def test_update_can_shrink_a_line_above_stock(app, client, make_user, make_product):
+    cake = make_product("Cake", stock=5)
+    headers = make_user("shopper")
+    client.post("/cart/add", headers=headers, json={"product_id": cake, "quantity": 5})
+    with app.app_context():
+        db.session.get(Product, cake).stock = 2
+        db.session.commit()
+    line = cart_line(client, headers)
+
+    response = client.post("/cart/update", headers=headers, json={"cart_item_id": line["cart_item_id"], "change": -1})
+    assert response.status_code == 200
+    assert response.get_json()["new_quantity"] == 4
@@ -0,0 +1,82 @@
+from backend.utils.guest_cart import MAX_LINE_QUANTITY
+
+
+def guest_cart(client, token=None, operations=()):
+    response = client.post("/guest-cart", json={"cart_token": token, "operations": list(operations)})
+    return response.status_code, response.get_json()
+
+
+def test_guest_cart_token_round_trip(client, make_product):
+    cake = make_product("Cake", stock=10)
+    tart = make_product("Tart", stock=10)
+
+    status, body = guest_cart(client, operations=[
+        {"op": "add", "product_id": cake, "quantity": 2},
+        {"op": "add", "product_id": tart, "quantity": 1},
+    ])
+    assert status == 200
+    status, body = guest_cart(client, body["cart_token"], [{"op": "update", "product_id": cake, "change": 1}])
+    assert status == 200
+
+    response = client.get("/guest-cart", query_string={"cart_token": body["cart_token"]})
+    assert response.status_code == 200
+    assert {line["product_id"]: line["quantity"] for line in response.get_json()["data"]} == {cake: 3, tart: 1}
+
+
+def test_guest_cart_quantities_stay_loadable(client, make_product):
+    cake = make_product("Cake", stock=5000)
+
+    status, body = guest_cart(client, operations=[{"op": "add", "product_id": cake, "quantity": 1500}])
+    assert status == 200
+    assert body["data"][0]["quantity"] == MAX_LINE_QUANTITY
+
+    status, body = guest_cart(client, body["cart_token"], [{"op": "add", "product_id": cake, "quantity": 5}])
+    assert status == 200
+    assert body["data"][0]["quantity"] == MAX_LINE_QUANTITY
+
+
+def test_guest_cart_quantities_capped_at_stock(client, make_product):
+    cake = make_product("Cake", stock=4)
+
+    status, body = guest_cart(client, operations=[{"op": "add", "product_id": cake, "quantity": 9}])
+    assert status == 200
+    assert body["data"][0]["quantity"] == 4
+
+
+def login_with_guest_cart(client, username, token):
+    response = client.post("/login", json={"username": username, "pass_word": "password", "guest_cart": token})
+    assert response.status_code == 200
+    return response.get_json(), {"Authorization": f"Bearer {response.get_json()['token']}"}
+
+
+def cart_quantities(client, headers):
+    return {line["product_id"]: line["quantity"] for line in client.get("/cart", headers=headers).get_json()["data"]}
+
+
+def test_login_merge_sums_guest_and_saved_lines(client, make_user, make_product):
+    cake = make_product("Cake", stock=10)
+    tart = make_product("Tart", stock=10)
+    headers = make_user("shopper")
+    client.post("/cart/add", headers=headers, json={"product_id": cake, "quantity": 2})
+    _, body = guest_cart(client, operations=[
+        {"op": "add", "product_id": cake, "quantity": 3},
+        {"op": "add", "product_id": tart, "quantity": 1},
+    ])
+
+    login, headers = login_with_guest_cart(client, "shopper", body["cart_token"])
+    assert login["guest_cart_merged"] == 2
+    assert cart_quantities(client, headers) == {cake: 5, tart: 1}
+
+
+def test_login_merge_caps_lines_at_stock(client, make_user, make_product):
+    cake = make_product("Cake", stock=5)
+    headers = make_user("shopper")
+    assert client.post("/cart/add", headers=headers, json={"product_id": cake, "quantity": 4}).get_json()["success"]
+    _, body = guest_cart(client, operations=[{"op": "add", "product_id": cake, "quantity": 5}])
+
+    _, headers = login_with_guest_cart(client, "shopper", body["cart_token"])
+    assert cart_quantities(client, headers) == {cake: 5}
+
+    # A line already at stock is left alone.
+    _, headers = login_with_guest_cart(client, "shopper", body["cart_token"])
+    assert cart_quantities(client, headers) == {cake: 5}
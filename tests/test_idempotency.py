@@ -0,0 +1,111 @@
+import datetime
+import json
+
+from sqlalchemy.exc import SQLAlchemyError
+
+from backend.extensions import db
+from backend.models import IdempotencyKey, Order, User
+from backend.routes import checkout
+from backend.utils.idempotency import IN_PROGRESS_TIMEOUT, request_fingerprint
+
+ENDPOINT = "checkout.create_order"
+ORDER = {"shipping_address": "1 Main St", "payment_method": "PayPal"}
+
+
+def shopper_with_cart(client, make_user, make_product, key):
+    headers = make_user("shopper")
+    cake = make_product("Cake", stock=10)
+    assert client.post("/cart/add", headers=headers, json={"product_id": cake, "quantity": 2}).get_json()["success"]
+    return dict(headers, **{"Idempotency-Key": key})
+
+
+def post_checkout(client, headers, body=ORDER):
+    return client.post("/checkout", headers=headers, data=json.dumps(body), content_type="application/json")
+
+
+def store_key(app, key, body=ORDER, status_code=None, age=0):
+    """Insert a key row for the shopper as if an earlier request had claimed it ``age`` seconds ago."""
+    with app.test_request_context("/checkout", method="POST", data=json.dumps(body), content_type="application/json"):
+        fingerprint = request_fingerprint()
+        user_id = User.query.filter_by(username="shopper").first().id
+        db.session.add(IdempotencyKey(
+            idempotency_key=key, endpoint=ENDPOINT, user_id=user_id, request_hash=fingerprint,
+            status_code=status_code, response_body="{}" if status_code else None,
+            created_at=datetime.datetime.utcnow() - datetime.timedelta(seconds=age)
+        ))
+        db.session.commit()
+
+
+def order_count(app):
+    with app.app_context():
+        return Order.query.count()
+
+
+def test_repeated_checkout_is_replayed(app, client, make_user, make_product):
+    headers = shopper_with_cart(client, make_user, make_product, "order-1")
+
+    first = post_checkout(client, headers)
+    assert first.status_code == 200
+    assert "Idempotent-Replayed" not in first.headers
+
+    replay = post_checkout(client, headers)
+    assert replay.status_code == 200
+    assert replay.headers["Idempotent-Replayed"] == "true"
+    assert replay.get_json()["order_id"] == first.get_json()["order_id"]
+    assert order_count(app) == 1
+
+
+def test_key_reused_with_different_body_is_rejected(app, client, make_user, make_product):
+    headers = shopper_with_cart(client, make_user, make_product, "order-1")
+    assert post_checkout(client, headers).status_code == 200
+
+    response = post_checkout(client, headers, dict(ORDER, shipping_address="2 Side St"))
+    assert response.status_code == 422
+    assert order_count(app) == 1
+
+
+def test_key_in_progress_is_rejected(app, client, make_user, make_product):
+    headers = shopper_with_cart(client, make_user, make_product, "order-1")
+    store_key(app, "order-1")
+
+    assert post_checkout(client, headers).status_code == 409
+    assert order_count(app) == 0
+
+
+def test_server_error_releases_key(app, client, make_user, make_product, monkeypatch):
+    headers = shopper_with_cart(client, make_user, make_product, "order-1")
+    create_order_from_cart = checkout.create_order_from_cart
+
+    def fail(*args):
+        raise SQLAlchemyError("connection reset")
+
+    monkeypatch.setattr(checkout, "create_order_from_cart", fail)
+    assert post_checkout(client, headers).status_code == 500
+    with app.app_context():
+        assert IdempotencyKey.query.count() == 0
+
+    monkeypatch.setattr(checkout, "create_order_from_cart", create_order_from_cart)
+    retry = post_checkout(client, headers)
+    assert retry.status_code == 200
+    assert "Idempotent-Replayed" not in retry.headers
+    assert order_count(app) == 1
+
+
+def test_expired_key_is_reclaimed(app, client, make_user, make_product):
+    headers = shopper_with_cart(client, make_user, make_product, "order-1")
+    store_key(app, "order-1", status_code=200, age=app.config["IDEMPOTENCY_KEY_TTL_SECONDS"] + 60)
+
+    response = post_checkout(client, headers)
+    assert response.status_code == 200
+    assert "Idempotent-Replayed" not in response.headers
+    assert order_count(app) == 1
+
+
+def test_abandoned_key_is_reclaimed(app, client, make_user, make_product):
+    headers = shopper_with_cart(client, make_user, make_product, "order-1")
+    store_key(app, "order-1", age=IN_PROGRESS_TIMEOUT + 60)
+
+    response = post_checkout(client, headers)
+    assert response.status_code == 200
+    assert "Idempotent-Replayed" not in response.headers
+    assert order_count(app) == 1
@@ -0,0 +1,70 @@
+import stripe
+
+from backend.extensions import db
+from backend.models import Order, User
+
+
+def pending_order(app, username):
+    with app.app_context():
+        user = User.query.filter_by(username=username).first()
+        order = Order(user_id=user.id, total_amount=12.5, shipping_address="1 Main St", status="Pending")
+        db.session.add(order)
+        db.session.commit()
+        return order.id
+
+
+class FakeSession:
+    id = "cs_test_123"
+    url = "https://checkout.stripe.test/cs_test_123"
+
+
+def test_transient_stripe_error_releases_idempotency_key(app, client, make_user, monkeypatch):
+    headers = dict(make_user("shopper"), **{"Idempotency-Key": "session-1"})
+    order_id = pending_order(app, "shopper")
+    monkeypatch.setattr(stripe, "api_key", "sk_test_dummy")
+    calls = []
+
+    def create(**params):
+        calls.append(params)
+        if len(calls) == 1:
+            raise stripe.error.APIConnectionError("timed out")
+        return FakeSession()
+
+    monkeypatch.setattr(stripe.checkout.Session, "create", create)
+
+    first = client.post("/create-checkout-session", headers=headers, json={"order_id": order_id})
+    assert first.status_code == 502
+
+    retry = client.post("/create-checkout-session", headers=headers, json={"order_id": order_id})
+    assert retry.status_code == 200
+    assert retry.get_json()["sessionId"] == FakeSession.id
+    assert "Idempotent-Replayed" not in retry.headers
+    # Both attempts reuse one Stripe idempotency key, so Stripe cannot create two sessions.
+    assert calls[0]["idempotency_key"] == calls[1]["idempotency_key"]
+
+
+def test_rate_limited_stripe_call_is_retryable(app, client, make_user, monkeypatch):
+    headers = dict(make_user("shopper"), **{"Idempotency-Key": "session-2"})
+    order_id = pending_order(app, "shopper")
+    monkeypatch.setattr(stripe, "api_key", "sk_test_dummy")
+
+    def create(**params):
+        raise stripe.error.RateLimitError("slow down")
+
+    monkeypatch.setattr(stripe.checkout.Session, "create", create)
+    assert client.post("/create-checkout-session", headers=headers, json={"order_id": order_id}).status_code == 503
+
+
+def test_card_error_is_stored_and_replayed(app, client, make_user, monkeypatch):
+    headers = dict(make_user("shopper"), **{"Idempotency-Key": "session-3"})
+    order_id = pending_order(app, "shopper")
+    monkeypatch.setattr(stripe, "api_key", "sk_test_dummy")
+
+    def create(**params):
+        raise stripe.error.InvalidRequestError("bad amount", "line_items")
+
+    monkeypatch.setattr(stripe.checkout.Session, "create", create)
+    assert client.post("/create-checkout-session", headers=headers, json={"order_id": order_id}).status_code == 400
+    replay = client.post("/create-checkout-session", headers=headers, json={"order_id": order_id})
+    assert replay.status_code == 400
+    assert replay.headers["Idempotent-Replayed"] == "true"
@@ -0,0 +1,78 @@
+import contextlib
+
+from sqlalchemy import event
+
+from backend.extensions import db
+
+
+@contextlib.contextmanager
+def count_queries(app):
+    statements = []
+
+    def record(conn, cursor, statement, parameters, context, executemany):
+        statements.append(statement)
+
+    with app.app_context():
+        engine = db.engine
+    event.listen(engine, "before_cursor_execute", record)
+    try:
+        yield statements
+    finally:
+        event.remove(engine, "before_cursor_execute", record)
+
+
+def warm_identity(client, *headers):
+    # Resolve each token once so the identity cache keeps users lookups out of the counts.
+    for header in headers:
+        assert client.get("/cart/summary", headers=header).status_code == 200
+
+
+def test_product_details_query_count(app, client, make_user, make_product):
+    make_product("Chocolate Cake")
+    reviewer = make_user("reviewer")
+    shopper = make_user("shopper")
+    assert client.post("/product/Chocolate Cake/review", headers=reviewer, json={"rating": 5}).status_code == 201
+    warm_identity(client, shopper)
+
+    # Cold cache: one query for the product, stats and review flag, one for the review page.
+    with count_queries(app) as statements:
+        response = client.get("/product/Chocolate Cake", headers=shopper)
+    assert response.status_code == 200
+    assert response.get_json()["can_review"] is True
+    assert len(response.get_json()["reviews"]) == 1
+    assert len(statements) == 2
+
+    # Warm cache: only the per-user "has reviewed" check reaches the database.
+    with count_queries(app) as statements:
+        response = client.get("/product/Chocolate Cake", headers=reviewer)
+    assert response.status_code == 200
+    assert response.get_json()["can_review"] is False
+    assert len(statements) == 1
+
+
+def test_product_details_skip_review_query_past_last_page(app, client, make_user, make_product):
+    make_product("Lemon Tart")
+    shopper = make_user("shopper")
+    warm_identity(client, shopper)
+
+    with count_queries(app) as statements:
+        response = client.get("/product/Lemon Tart?page=3", headers=shopper)
+    assert response.status_code == 200
+    assert response.get_json()["reviews"] == []
+    assert len(statements) == 1
+
+
+def test_product_details_cap_page_size_and_keep_catalog_cache(app, client, make_user, make_product):
+    from backend.extensions import catalog_cache, product_details_cache
+    from backend.routes.products import MAX_REVIEWS_PAGE_SIZE
+
+    make_product("Carrot Cake")
+    shopper = make_user("shopper")
+    catalog_entries, detail_entries = len(catalog_cache._entries), len(product_details_cache._entries)
+
+    for page in range(1, 6):
+        response = client.get(f"/product/Carrot Cake?page={page}&per_page=100000", headers=shopper)
+        assert response.status_code == 200
+        assert response.get_json()["pagination"]["per_page"] == MAX_REVIEWS_PAGE_SIZE
+    assert len(product_details_cache._entries) == detail_entries + 5
+    assert len(catalog_cache._entries) == catalog_entries
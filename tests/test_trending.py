@@ -0,0 +1,64 @@
+import datetime
+
+import pytest
+
+from backend.extensions import db
+from backend.models import ProductTrendingScore
+from backend.routes import bestsellers
+from backend.utils.trending import TrendingEngine
+
+
+@pytest.fixture
+def engine(monkeypatch):
+    # A day-long half-life keeps decay negligible over the test.
+    engine = TrendingEngine(half_life=86400)
+    monkeypatch.setattr(bestsellers, "trending", engine)
+    return engine
+
+
+def stored_scores(app):
+    with app.app_context():
+        return {product_id: round(score, 3) for product_id, score in
+                db.session.query(ProductTrendingScore.product_id, ProductTrendingScore.score)}
+
+
+def test_snapshot_keeps_other_workers_scores(app, engine, make_product):
+    cake, tart = make_product("Cake"), make_product("Tart")
+    with app.app_context():
+        db.session.add(ProductTrendingScore(product_id=cake, score=4.0, updated_at=datetime.datetime.utcnow()))
+        db.session.commit()
+
+    engine.record(tart, 2.0)
+    with app.app_context():
+        assert bestsellers.snapshot_trending() == 1
+    assert stored_scores(app) == {cake: 4.0, tart: 2.0}
+
+
+def test_snapshot_adds_only_new_activity(app, engine, make_product):
+    cake = make_product("Cake")
+    engine.record(cake, 3.0)
+    with app.app_context():
+        bestsellers.snapshot_trending()
+        # Nothing new was recorded, so a second snapshot writes nothing.
+        assert bestsellers.snapshot_trending() == 0
+    engine.record(cake, 1.0)
+    with app.app_context():
+        bestsellers.snapshot_trending()
+    assert stored_scores(app) == {cake: 4.0}
+
+
+def test_failed_snapshot_keeps_activity(app, engine, make_product, monkeypatch):
+    cake = make_product("Cake")
+    engine.record(cake, 3.0)
+
+    def fail():
+        raise RuntimeError("database unavailable")
+
+    with app.app_context():
+        monkeypatch.setattr(db.session, "commit", fail)
+        with pytest.raises(RuntimeError):
+            bestsellers.snapshot_trending()
+        monkeypatch.undo()
+        monkeypatch.setattr(bestsellers, "trending", engine)
+        bestsellers.snapshot_trending()
+    assert stored_scores(app) == {cake: 3.0}